@@ -1,14 +1,67 @@
 import asyncio
-import json
-import yaml
+import copy
+import functools
 import aiohttp
 import os
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
 import logging
 
 from agent_connect.authentication import DIDWbaAuthHeader
 
+from anp_examples.auth_cache import DIDAuthCache
+from anp_examples.cassette import Cassette
+from anp_examples.content_encoding import ACCEPT_ENCODING, DecompressionError, StreamDecoder
+from anp_examples.http_cache import CacheEntry, HTTPCache
+from anp_examples.metrics import MetricsSink, create_trace_config, elapsed_ms, finish_timing
+from anp_examples.resilience import IDEMPOTENT_METHODS, HostRegistry, RetryPolicy
+from anp_examples.singleflight import SingleFlight
+from anp_examples.utils import json_codec, yaml_codec
+from anp_examples.utils.env import env_flag
+
+# Default byte budget of the response cache, can be overridden with ANP_HTTP_CACHE_MAX_BYTES
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Default maximum response body size, can be overridden with ANP_MAX_RESPONSE_BYTES
+DEFAULT_MAX_RESPONSE_BYTES = 10 * 1024 * 1024
+
+# Size of the chunks response bodies are streamed in
+READ_CHUNK_SIZE = 64 * 1024
+
+# Default number of requests execute_many runs at the same time
+DEFAULT_BATCH_CONCURRENCY = 10
+
+# Timing fields reported to the metrics sink
+TIMING_PHASES = (
+    "queue_ms",
+    "dns_ms",
+    "connect_ms",
+    "ttfb_ms",
+    "transfer_ms",
+    "parse_ms",
+    "total_ms",
+)
+
+# Content types that are parsed as structured documents and therefore never truncated
+STRUCTURED_CONTENT_TYPES = ("application/json", "application/yaml", "application/x-yaml")
+
+# Request headers that control the cache rather than select a response, left out of cache keys
+UNKEYED_REQUEST_HEADERS = ("cache-control", "pragma")
+
+
+class ResponseTooLargeError(Exception):
+    """Raised when a response body exceeds the configured size limit"""
+
+    def __init__(self, max_bytes: int, received_bytes: int):
+        super().__init__(
+            f"Response body exceeds the limit of {max_bytes} bytes "
+            f"(received at least {received_bytes} bytes)"
+        )
+        self.max_bytes = max_bytes
+        self.received_bytes = received_bytes
+
 
 class ANPTool:
     name: str = "anp_tool"
@@ -55,6 +108,24 @@ class ANPTool:
         self,
         did_document_path: Optional[str] = None,
         private_key_path: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 10,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        cache_max_bytes: Optional[int] = None,
+        max_response_bytes: Optional[int] = None,
+        truncate_text_responses: Optional[bool] = None,
+        auth_refresh_margin: float = 60.0,
+        signing_workers: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        connect_timeout: float = 10.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_requests: Optional[bool] = None,
+        circuit_failure_threshold: int = 5,
+        circuit_reset_timeout: float = 30.0,
+        metrics_sink: Optional[MetricsSink] = None,
+        cassette: Optional[Cassette] = None,
         **data,
     ):
         """
@@ -63,9 +134,93 @@ class ANPTool:
         Args:
             did_document_path (str, optional): Path to DID document file. If None, will use default path.
             private_key_path (str, optional): Path to private key file. If None, will use default path.
+            session (aiohttp.ClientSession, optional): Shared session to send requests with. If None,
+                ANPTool lazily creates its own pooled session and closes it in close().
+            connection_limit (int, optional): Total number of pooled connections, default is 100
+            connection_limit_per_host (int, optional): Pooled connections per host, default is 10
+            keepalive_timeout (float, optional): Seconds an idle connection is kept alive, default is 30
+            dns_cache_ttl (int, optional): Seconds resolved host addresses are cached, default is 300
+            cache_max_bytes (int, optional): Byte budget of the GET response cache. If None, uses
+                ANP_HTTP_CACHE_MAX_BYTES or 32 MiB. 0 disables caching.
+            max_response_bytes (int, optional): Largest response body that is read. If None, uses
+                ANP_MAX_RESPONSE_BYTES or 10 MiB.
+            truncate_text_responses (bool, optional): Whether plain text bodies over the limit are
+                truncated instead of rejected. If None, uses ANP_TRUNCATE_TEXT_RESPONSES or True.
+                JSON and YAML bodies over the limit are always rejected.
+            auth_refresh_margin (float, optional): Seconds before a bearer token's expiry at which
+                it is replaced by a fresh DID authentication header, default is 60
+            signing_workers (int, optional): Size of the thread pool DID signing runs on. If None,
+                uses ANP_SIGNING_WORKERS or 4.
+            request_timeout (float, optional): Total seconds allowed per attempt. If None, uses
+                ANP_REQUEST_TIMEOUT or 30.
+            connect_timeout (float, optional): Seconds allowed to establish a connection, default is 10
+            retry_policy (RetryPolicy, optional): Backoff for idempotent requests. If None, retries up
+                to ANP_MAX_RETRIES (default 2) times on connection errors, timeouts and 429/502/503/504.
+            hedge_requests (bool, optional): Whether a GET still outstanding after the host's p95
+                latency is raced by a second identical request. If None, uses ANP_HEDGE_REQUESTS or False.
+            circuit_failure_threshold (int, optional): Consecutive failures that open a host's circuit,
+                default is 5
+            circuit_reset_timeout (float, optional): Seconds an open circuit fails fast before a trial
+                request is let through, default is 30
+            metrics_sink (MetricsSink, optional): Receives request phase timings, response sizes,
+                cache outcomes and DID signing times. If None, measurements are only returned in
+                each result's timing field.
+            cassette (Cassette, optional): Records exchanges to, or replays them from, a cassette
+                file. If None, uses ANP_CASSETTE_MODE and ANP_CASSETTE_PATH when they are set.
         """
         super().__init__(**data)
 
+        self.metrics_sink = metrics_sink or MetricsSink()
+        self.cassette = cassette if cassette is not None else Cassette.from_env()
+        self._session = session
+        self._owns_session = session is None
+        self.connection_limit_per_host = connection_limit_per_host
+        self._connector_kwargs = {
+            "limit": connection_limit,
+            "limit_per_host": connection_limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+            "ttl_dns_cache": dns_cache_ttl,
+        }
+
+        if cache_max_bytes is None:
+            cache_max_bytes = int(
+                os.environ.get("ANP_HTTP_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)
+            )
+        self.cache: Optional[HTTPCache] = (
+            HTTPCache(cache_max_bytes) if cache_max_bytes > 0 else None
+        )
+        if max_response_bytes is None:
+            max_response_bytes = int(
+                os.environ.get("ANP_MAX_RESPONSE_BYTES", DEFAULT_MAX_RESPONSE_BYTES)
+            )
+        self.max_response_bytes = max_response_bytes
+        if truncate_text_responses is None:
+            truncate_text_responses = env_flag("ANP_TRUNCATE_TEXT_RESPONSES", True)
+        self.truncate_text_responses = truncate_text_responses
+
+        if request_timeout is None:
+            request_timeout = float(os.environ.get("ANP_REQUEST_TIMEOUT", 30))
+        self.request_timeout = request_timeout
+        self._client_timeout = aiohttp.ClientTimeout(
+            total=request_timeout, connect=connect_timeout
+        )
+        if retry_policy is None:
+            retry_policy = RetryPolicy(
+                max_attempts=int(os.environ.get("ANP_MAX_RETRIES", 2)) + 1
+            )
+        self.retry_policy = retry_policy
+        if hedge_requests is None:
+            hedge_requests = env_flag("ANP_HEDGE_REQUESTS", False)
+        self.hedge_requests = hedge_requests
+        self.hosts = HostRegistry(
+            failure_threshold=circuit_failure_threshold,
+            reset_timeout=circuit_reset_timeout,
+        )
+
+        self._background_tasks = set()
+        self._revalidating = set()
+        self._in_flight = SingleFlight()
+
         # Get current script directory
         current_dir = Path(__file__).parent
         # Get project root directory
@@ -95,6 +250,55 @@ class ANPTool:
         self.auth_client = DIDWbaAuthHeader(
             did_document_path=did_document_path, private_key_path=private_key_path
         )
+        if signing_workers is None:
+            signing_workers = int(os.environ.get("ANP_SIGNING_WORKERS", 4))
+        self.auth_cache = DIDAuthCache(
+            self.auth_client,
+            refresh_margin=auth_refresh_margin,
+            signing_workers=signing_workers,
+            metrics_sink=self.metrics_sink,
+        )
+        # Requests signed with different DIDs must never share a response
+        self._auth_identity = did_document_path
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            if not self._owns_session:
+                raise RuntimeError("The session injected into ANPTool has been closed")
+            # Bodies are decoded by ANPTool so the decoded size can be capped while streaming
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self._connector_kwargs),
+                trace_configs=[create_trace_config()],
+                auto_decompress=False,
+            )
+            logging.info(
+                f"ANPTool created pooled HTTP session: {self._connector_kwargs}"
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled session if it is owned by this ANPTool and finish cassette writes"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        # Shared requests run in their own tasks and would reopen the session
+        await self._in_flight.cancel_all()
+        await self.auth_cache.close()
+        if self.cassette is not None:
+            await self.cassette.close()
+
+        if self._owns_session and self._session is not None:
+            if not self._session.closed:
+                await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "ANPTool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
 
     async def execute(
         self,
@@ -103,6 +307,7 @@ class ANPTool:
         headers: Dict[str, str] = None,
         params: Dict[str, Any] = None,
         body: Dict[str, Any] = None,
+        timeout: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Execute HTTP request to interact with other agents
@@ -113,11 +318,41 @@ class ANPTool:
             headers (Dict[str, str], optional): HTTP request headers
             params (Dict[str, Any], optional): URL query parameters
             body (Dict[str, Any], optional): Request body for POST/PUT requests
+            timeout (float, optional): Seconds the caller waits for the result, retries
+                included, e.g. the time left until a deadline. If None, only the
+                per-attempt request_timeout applies.
 
         Returns:
-            Dict[str, Any]: Response content
+            Dict[str, Any]: Response content, or a "deadline_exceeded" error if the
+                timeout ran out
         """
+        if timeout is None:
+            return await self._execute(url, method, headers, params, body)
+
+        if timeout > 0:
+            try:
+                return await asyncio.wait_for(
+                    self._execute(url, method, headers, params, body), timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+        logging.warning(f"ANP request to {url} did not finish within its deadline of {timeout:.1f}s")
+        return {
+            "error": f"Request did not finish within the deadline of {max(timeout, 0):.1f}s",
+            "error_type": "deadline_exceeded",
+            "status_code": 504,
+            "url": str(url),
+        }
 
+    async def _execute(
+        self,
+        url: str,
+        method: str,
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, Any]],
+        body: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Serve a request from the cache, an identical in-flight request or the network"""
         if headers is None:
             headers = {}
         if params is None:
@@ -129,113 +364,680 @@ class ANPTool:
         if "Content-Type" not in headers and method in ["POST", "PUT", "PATCH"]:
             headers["Content-Type"] = "application/json"
 
-        # Add DID authentication
+        flight_key = self._flight_key(method, url, headers, params, body)
+        cache_key = self._cache_key(method, url, headers, params, body)
+        if cache_key is None:
+            return await self._coalesced(
+                flight_key, lambda: self._send(method, url, headers, params, body)
+            )
+
+        # Serve GET requests from the response cache where possible
+        request_cache_control = str(headers.get("Cache-Control", "")).lower()
+        bypass = "no-cache" in request_cache_control or "no-store" in request_cache_control
+        entry = None
+        if bypass:
+            self._record_cache("bypass", url)
+        else:
+            entry = self.cache.get(cache_key)
+
+        if entry is not None:
+            now = time.monotonic()
+            if entry.is_fresh(now):
+                self._record_cache("hit", url)
+                logging.info(f"ANP cache hit: {url}")
+                return self._cached_result(entry, url, "hit")
+            if entry.is_stale_usable(now):
+                self._record_cache("stale", url)
+                logging.info(f"ANP cache stale hit, revalidating in background: {url}")
+                if cache_key not in self._revalidating:
+                    self._revalidating.add(cache_key)
+                    self._spawn(self._revalidate(cache_key, url, headers, params, entry))
+                return self._cached_result(entry, url, "stale")
+
+        result = await self._coalesced(
+            flight_key,
+            lambda: self._send(
+                method, url, headers, params, body, cache_key=cache_key, cache_entry=entry
+            ),
+        )
+        # Bypasses were already counted, every lookup is counted once
+        if not bypass:
+            outcome = "coalesced" if result.get("coalesced") else result.get("cache", "miss")
+            self._record_cache(outcome, url)
+        return result
+
+    async def execute_many(
+        self,
+        requests: List[Dict[str, Any]],
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        per_host_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute several requests concurrently
+
+        Args:
+            requests (List[Dict[str, Any]]): Request specs, each with the keyword arguments of
+                execute (url, and optionally method, headers, params, body)
+            concurrency (int, optional): Requests in flight across the whole batch, default is 10
+            per_host_concurrency (int, optional): Requests in flight per host. If None, uses the
+                connection pool's per-host limit.
+
+        Returns:
+            List[Dict[str, Any]]: One result per request, in input order. A request that fails
+                yields an error result instead of failing the batch.
+        """
+        if per_host_concurrency is None:
+            per_host_concurrency = self.connection_limit_per_host
+        batch_limit = asyncio.Semaphore(max(concurrency, 1))
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def run(spec: Dict[str, Any]) -> Dict[str, Any]:
+            url = spec.get("url")
+            try:
+                host = urlparse(str(url)).netloc
+                if host not in host_limits:
+                    host_limits[host] = asyncio.Semaphore(max(per_host_concurrency, 1))
+                # The host slot comes first, so requests queued for a busy host do not
+                # hold batch slots that requests to other hosts could use
+                async with host_limits[host], batch_limit:
+                    return await self.execute(**spec)
+            except Exception as e:
+                logging.error(f"Batch request failed for URL {url}: {str(e)}")
+                return {
+                    "error": f"Request failed: {str(e)}",
+                    "error_type": "exception",
+                    "status_code": 500,
+                    "url": str(url),
+                }
+
+        logging.info(f"ANP batch request: {len(requests)} requests")
+        return list(await asyncio.gather(*(run(spec) for spec in requests)))
+
+    def _record_cache(self, outcome: str, url) -> None:
+        """Count a cache lookup outcome in the cache stats and the metrics sink"""
+        self.cache.record(outcome)
+        self.metrics_sink.record(
+            "anp.cache.lookup", 1, {"host": urlparse(str(url)).netloc, "outcome": outcome}
+        )
+
+    @staticmethod
+    def _freeze(mapping):
+        """Turn a flat mapping into a hashable, order-independent tuple"""
+        try:
+            return tuple(sorted((str(k), str(v)) for k, v in mapping.items()))
+        except AttributeError:
+            return None
+
+    def _cache_key(self, method, url, headers, params, body):
+        """
+        Return the cache key of a request, or None if it must not be cached
+
+        Request headers are part of the key, so responses that vary with them (e.g. on
+        Accept) are never served to requests with different headers.
+        """
+        if self.cache is None or method.upper() != "GET" or body is not None:
+            return None
+        frozen_params = self._freeze(params)
+        frozen_headers = self._freeze(headers)
+        if frozen_params is None or frozen_headers is None:
+            return None
+        keyed_headers = tuple(
+            sorted(
+                (name.lower(), value)
+                for name, value in frozen_headers
+                if name.lower() not in UNKEYED_REQUEST_HEADERS
+            )
+        )
+        return (url, frozen_params, keyed_headers)
+
+    def _flight_key(self, method, url, headers, params, body):
+        """Return the key identical concurrent requests share, or None for non-GET requests"""
+        if method.upper() != "GET" or body is not None:
+            return None
+        frozen_params = self._freeze(params)
+        frozen_headers = self._freeze(headers)
+        if frozen_params is None or frozen_headers is None:
+            return None
+        return ("GET", url, frozen_params, frozen_headers, self._auth_identity)
+
+    async def _coalesced(self, flight_key, send) -> Dict[str, Any]:
+        """Run send once per flight key, sharing the result with concurrent identical requests"""
+        if flight_key is None:
+            return await send()
+
+        result, shared = await self._in_flight.do(flight_key, send)
+        if shared:
+            logging.info(f"ANP request coalesced with in-flight request: {flight_key[1]}")
+            # Parsed documents must not be shared between callers
+            result = copy.deepcopy(result)
+            result["coalesced"] = True
+        return result
+
+    def _spawn(self, coro) -> None:
+        """Run a coroutine in the background, keeping a reference until it finishes"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _revalidate(self, cache_key, url, headers, params, entry) -> None:
+        """Refresh a stale cache entry without blocking the caller"""
+        try:
+            await self._send(
+                "GET", url, dict(headers), params, None, cache_key=cache_key, cache_entry=entry
+            )
+        except Exception as e:
+            logging.warning(f"Background revalidation failed for {url}: {str(e)}")
+        finally:
+            self._revalidating.discard(cache_key)
+
+    def _cached_result(self, entry: CacheEntry, url, cache_status: str) -> Dict[str, Any]:
+        """Build a fresh result dictionary from a cache entry"""
+        parse_started = time.perf_counter()
+        result = self._build_result(
+            entry.status, entry.content_type, entry.body, entry.encoding, url
+        )
+        parse_ms = elapsed_ms(parse_started)
+        result["cache"] = cache_status
+        result["timing"] = {"parse_ms": parse_ms, "bytes": len(entry.body), "total_ms": parse_ms}
+        return result
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        params: Dict[str, Any],
+        body: Optional[Dict[str, Any]],
+        cache_key=None,
+        cache_entry: Optional[CacheEntry] = None,
+    ) -> Dict[str, Any]:
+        """Send the request with timeouts, retries, hedging and per-host circuit breaking"""
+        started = time.perf_counter()
+        host = urlparse(str(url)).netloc
+        breaker = self.hosts.breaker(host)
+        if not breaker.allow():
+            logging.warning(f"Circuit open for host {host}, failing fast: {url}")
+            return {
+                "error": f"Circuit open for host {host}, retry in {breaker.retry_in():.1f}s",
+                "error_type": "circuit_open",
+                "status_code": 503,
+                "url": str(url),
+            }
+
+        # Error responses to non-idempotent calls say more about the request the model built
+        # than about the host, so only transport errors and idempotent requests trip the circuit
+        counts_status = method.upper() in IDEMPOTENT_METHODS
+        # A cancelled trial request would otherwise leave the circuit half-open
+        is_trial = breaker.state == breaker.HALF_OPEN
+        attempts = self.retry_policy.attempts_for(method)
+        try:
+            for attempt in range(attempts):
+                is_last_attempt = attempt + 1 >= attempts
+                try:
+                    result, retry_after = await self._hedged_attempt(
+                        method, url, headers, params, body, cache_key, cache_entry
+                    )
+                except ResponseTooLargeError as e:
+                    logging.error(f"Response from {url} rejected: {str(e)}")
+                    breaker.record_success()
+                    result = {
+                        "error": str(e),
+                        "error_type": "response_too_large",
+                        "max_bytes": e.max_bytes,
+                        "status_code": 502,
+                        "url": str(url),
+                    }
+                    break
+                except DecompressionError as e:
+                    logging.error(f"Response from {url} could not be decoded: {str(e)}")
+                    breaker.record_success()
+                    result = {
+                        "error": str(e),
+                        "error_type": "decompression_failed",
+                        "status_code": 502,
+                        "url": str(url),
+                    }
+                    break
+                except asyncio.TimeoutError:
+                    breaker.record_failure()
+                    logging.warning(
+                        f"HTTP request timed out (attempt {attempt + 1}/{attempts}): {url}"
+                    )
+                    if is_last_attempt or not breaker.allow():
+                        result = {
+                            "error": f"HTTP request timed out after {self.request_timeout}s",
+                            "error_type": "timeout",
+                            "status_code": 504,
+                            "url": str(url),
+                        }
+                        break
+                    await asyncio.sleep(self.retry_policy.delay(attempt))
+                    continue
+                except aiohttp.ClientError as e:
+                    breaker.record_failure()
+                    logging.error(
+                        f"HTTP request failed (attempt {attempt + 1}/{attempts}): {str(e)}"
+                    )
+                    if is_last_attempt or not breaker.allow():
+                        result = {
+                            "error": f"HTTP request failed: {str(e)}",
+                            "status_code": 500,
+                            "url": str(url),
+                        }
+                        break
+                    await asyncio.sleep(self.retry_policy.delay(attempt))
+                    continue
+
+                status = result.get("status_code")
+                if status not in self.retry_policy.retry_statuses:
+                    if status is not None and status >= 500 and counts_status:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    break
+
+                if counts_status:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if is_last_attempt or not breaker.allow():
+                    break
+                delay = self.retry_policy.delay(attempt, retry_after)
+                logging.warning(
+                    f"Transient status {status} from {url}, retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{attempts})"
+                )
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if is_trial:
+                breaker.release_trial()
+            raise
+
+        timing = result.setdefault("timing", {})
+        timing["attempts"] = attempt + 1
+        timing["total_ms"] = elapsed_ms(started)
+        self._record_timing(method, host, result)
+        return result
+
+    def _record_timing(self, method: str, host: str, result: Dict[str, Any]) -> None:
+        """Send the timing of a finished request to the metrics sink"""
+        timing = result.get("timing", {})
+        tags = {
+            "host": host,
+            "method": method.upper(),
+            "status": str(result.get("status_code")),
+        }
+        for phase in TIMING_PHASES:
+            if phase in timing:
+                self.metrics_sink.record(f"anp.request.{phase}", timing[phase], tags)
+        if "bytes" in timing:
+            self.metrics_sink.record("anp.response.bytes", timing["bytes"], tags)
+        if "wire_bytes" in timing:
+            self.metrics_sink.record("anp.response.wire_bytes", timing["wire_bytes"], tags)
+
+    async def _hedged_attempt(
+        self, method, url, headers, params, body, cache_key, cache_entry
+    ):
+        """
+        Run one attempt; for GETs to hosts with enough latency history, fire a second
+        identical attempt once the first has been outstanding longer than the host's p95
+        """
+        host = urlparse(str(url)).netloc
+        hedge_delay = None
+        if self.hedge_requests and method.upper() == "GET":
+            hedge_delay = self.hosts.latency(host).percentile(0.95)
+
+        def start_attempt():
+            return asyncio.ensure_future(
+                self._timed_attempt(
+                    method, url, dict(headers), params, body, cache_key, cache_entry
+                )
+            )
+
+        if hedge_delay is None:
+            return await self._timed_attempt(
+                method, url, headers, params, body, cache_key, cache_entry
+            )
+
+        primary = start_attempt()
+        attempts = {primary}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            logging.info(f"Hedging GET after {hedge_delay:.3f}s without response: {url}")
+            attempts.add(start_attempt())
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    # Prefer the first attempt that succeeded; surface an error only
+                    # when both attempts failed
+                    if task.exception() is None or not pending:
+                        return task.result()
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def _timed_attempt(
+        self, method, url, headers, params, body, cache_key, cache_entry
+    ):
+        """Run one attempt and record its latency for the host's hedging threshold"""
+        started = time.monotonic()
+        result, retry_after = await self._attempt(
+            method, url, headers, params, body, cache_key, cache_entry
+        )
+        if "error" not in result:
+            host = urlparse(str(url)).netloc
+            self.hosts.latency(host).record(time.monotonic() - started)
+        return result, retry_after
+
+    async def _attempt(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        params: Dict[str, Any],
+        body: Optional[Dict[str, Any]],
+        cache_key=None,
+        cache_entry: Optional[CacheEntry] = None,
+    ):
+        """
+        Send the request once with DID authentication and process the response
+
+        Returns:
+            Tuple[Dict[str, Any], Optional[str]]: (result, Retry-After header of the response)
+        """
+        if self.cassette is not None and self.cassette.is_replaying:
+            return await self._replay(method, url, params, body, cache_key, cache_entry)
+
+        # Add DID authentication, reusing a cached token or a pre-signed header
         if self.auth_client:
             try:
-                auth_headers = self.auth_client.get_auth_header(url)
+                auth_headers = await self.auth_cache.get_auth_header(url)
                 headers.update(auth_headers)
             except Exception as e:
                 logging.error(f"Failed to get authentication header: {str(e)}")
 
-        async with aiohttp.ClientSession() as session:
-            # Prepare request parameters
-            request_kwargs = {
-                "url": url,
-                "headers": headers,
-                "params": params,
-            }
+        session = await self._get_session()
 
-            # If there is a request body and the method supports it, add the request body
-            if body is not None and method in ["POST", "PUT", "PATCH"]:
-                request_kwargs["json"] = body
+        # Revalidate cached entries with a conditional request
+        request_headers = headers
+        if cache_entry is not None and cache_entry.has_validators():
+            request_headers = {**headers, **cache_entry.conditional_headers()}
 
-            # Execute request
-            http_method = getattr(session, method.lower())
+        # Offer every content coding that can be decoded. Injected sessions that decode
+        # bodies themselves keep aiohttp's default Accept-Encoding.
+        if not session.auto_decompress and not any(
+            name.lower() == "accept-encoding" for name in request_headers
+        ):
+            request_headers = {**request_headers, "Accept-Encoding": ACCEPT_ENCODING}
 
-            try:
-                async with http_method(**request_kwargs) as response:
-                    logging.info(f"ANP response: status code {response.status}")
-
-                    # Check response status
-                    if (
-                        response.status == 401
-                        and "Authorization" in headers
-                        and self.auth_client
-                    ):
-                        logging.warning(
-                            "Authentication failed (401), trying to get authentication again"
-                        )
-                        # If authentication fails and a token was used, clear the token and retry
-                        self.auth_client.clear_token(url)
-                        # Get authentication header again
-                        headers.update(
-                            self.auth_client.get_auth_header(url, force_new=True)
-                        )
-                        # Execute request again
-                        request_kwargs["headers"] = headers
-                        async with http_method(**request_kwargs) as retry_response:
-                            logging.info(
-                                f"ANP retry response: status code {retry_response.status}"
-                            )
-                            return await self._process_response(retry_response, url)
-
-                    return await self._process_response(response, url)
-            except aiohttp.ClientError as e:
-                logging.error(f"HTTP request failed: {str(e)}")
-                return {"error": f"HTTP request failed: {str(e)}", "status_code": 500}
-
-    async def _process_response(self, response, url):
+        # Prepare request parameters, collecting phase timings through the trace config
+        timing = {}
+        request_kwargs = {
+            "url": url,
+            "headers": request_headers,
+            "params": params,
+            "timeout": self._client_timeout,
+            "trace_request_ctx": timing,
+        }
+
+        # If there is a request body and the method supports it, add the request body
+        if body is not None and method in ["POST", "PUT", "PATCH"]:
+            request_kwargs["json"] = body
+
+        record = None
+        if self.cassette is not None and self.cassette.is_recording:
+            record = functools.partial(
+                self.cassette.record, method, url, params, body, request_headers
+            )
+
+        # Execute request
+        http_method = getattr(session, method.lower())
+
+        async with http_method(**request_kwargs) as response:
+            logging.info(f"ANP response: status code {response.status}")
+
+            # Check response status
+            if not (
+                response.status == 401
+                and "Authorization" in headers
+                and self.auth_client
+            ):
+                result = await self._process_response(
+                    response, url, cache_key, cache_entry, timing, record
+                )
+                return result, response.headers.get("Retry-After")
+
+        # The rejected response is released first so the retry does not
+        # hold two pooled connections to the same host
+        logging.warning(
+            "Authentication failed (401), trying to get authentication again"
+        )
+        # If authentication fails and a token was used, clear the token and retry
+        self.auth_cache.invalidate(url)
+        # Get authentication header again
+        auth_headers = await self.auth_cache.get_auth_header(url)
+        headers.update(auth_headers)
+        request_headers.update(auth_headers)
+        # Execute request again
+        async with http_method(**request_kwargs) as retry_response:
+            logging.info(
+                f"ANP retry response: status code {retry_response.status}"
+            )
+            result = await self._process_response(
+                retry_response, url, cache_key, cache_entry, timing, record
+            )
+            return result, retry_response.headers.get("Retry-After")
+
+    async def _replay(
+        self,
+        method: str,
+        url: str,
+        params: Dict[str, Any],
+        body: Optional[Dict[str, Any]],
+        cache_key=None,
+        cache_entry: Optional[CacheEntry] = None,
+    ):
+        """Answer a request from the cassette instead of the network"""
+        started = time.perf_counter()
+        response = await self.cassette.replay(method, url, params, body)
+        if response is None:
+            return {
+                "error": f"No recorded response in cassette for {method} {url}",
+                "error_type": "cassette_miss",
+                "status_code": 404,
+                "url": str(url),
+            }, None
+
+        logging.info(f"ANP replayed response: status code {response.status}")
+        timing = {"ttfb_ms": elapsed_ms(started)}
+        result = await self._process_response(response, url, cache_key, cache_entry, timing)
+        return result, response.headers.get("Retry-After")
+
+    async def _process_response(
+        self, response, url, cache_key=None, cache_entry=None, timing=None, record=None
+    ):
         """Process HTTP response"""
+        if timing is None:
+            timing = {}
         # If authentication is successful, update the token
-        if response.status == 200 and self.auth_client:
+        if response.status in (200, 304) and self.auth_client:
             try:
-                self.auth_client.update_token(url, dict(response.headers))
+                await self.auth_cache.update_from_response(url, response.headers)
             except Exception as e:
                 logging.error(f"Failed to update token: {str(e)}")
 
+        # A 304 confirms the cached body is still current
+        if response.status == 304 and record is not None:
+            record(response.status, response.headers, b"")
+        if response.status == 304 and cache_entry is not None:
+            if cache_entry.refresh(response.headers):
+                self.cache.put(cache_key, cache_entry)
+            else:
+                self.cache.invalidate(cache_key)
+            logging.info(f"ANP cache revalidated: {url}")
+            result = self._cached_result(cache_entry, url, "revalidated")
+            result["timing"] = {**finish_timing(timing), **result["timing"]}
+            return result
+
         # Get response content type
         content_type = response.headers.get("Content-Type", "").lower()
 
-        # Get response text
-        text = await response.text()
+        # Get response body
+        truncatable = self.truncate_text_responses and not any(
+            structured in content_type for structured in STRUCTURED_CONTENT_TYPES
+        )
+        read_started = time.perf_counter()
+        body, truncated, wire_bytes = await self._read_body(response, truncatable)
+        timing["transfer_ms"] = elapsed_ms(read_started)
+        if wire_bytes is not None:
+            timing["wire_bytes"] = wire_bytes
+        timing["bytes"] = len(body)
+        encoding = response.charset or "utf-8"
+        if record is not None:
+            record(response.status, response.headers, body)
+
+        if cache_key is not None:
+            new_entry = None
+            if response.status == 200 and not truncated:
+                new_entry = CacheEntry.from_response(
+                    response.status, response.headers, body, content_type, encoding
+                )
+            if new_entry is not None:
+                self.cache.put(cache_key, new_entry)
+            else:
+                self.cache.invalidate(cache_key)
+
+        parse_started = time.perf_counter()
+        result = self._build_result(response.status, content_type, body, encoding, url)
+        timing["parse_ms"] = elapsed_ms(parse_started)
+        result["timing"] = finish_timing(timing)
+        if response.status == 200 and self.auth_client:
+            # Sign headers ahead of time for hosts the description marks as DID-WBA protected
+            self.auth_cache.note_document(url, result)
+        if truncated:
+            result["truncated"] = True
+            result["max_bytes"] = self.max_response_bytes
+        if cache_key is not None:
+            result["cache"] = "miss"
+        return result
+
+    async def _read_body(self, response, truncatable: bool):
+        """
+        Stream and decode the response body without exceeding max_response_bytes
+
+        Compressed bodies are decoded chunk by chunk, so the limit applies to the
+        decoded size and an oversized body is abandoned before it is fully inflated.
+
+        Args:
+            response: aiohttp response whose body has not been read yet
+            truncatable (bool): Whether an oversized body is cut at the limit instead of rejected
+
+        Returns:
+            Tuple[bytes, bool, Optional[int]]: (decoded body, whether the body was truncated,
+                bytes received on the wire or None if the session decoded the body itself)
+
+        Raises:
+            ResponseTooLargeError: If the body exceeds the limit and cannot be truncated
+            DecompressionError: If the body uses an unsupported or corrupt content coding
+        """
+        max_bytes = self.max_response_bytes
+        session_decodes = self._session is not None and self._session.auto_decompress
+        if session_decodes:
+            # The session already decodes bodies, so they are read as they arrive
+            decoder = StreamDecoder(None)
+        else:
+            decoder = StreamDecoder(response.headers.get("Content-Encoding"))
+
+        # Reject early when the declared length already exceeds the limit; a compressed
+        # body is never smaller on the wire than the limit it decodes within
+        declared_length = response.content_length
+        if declared_length is not None and declared_length > max_bytes and not truncatable:
+            raise ResponseTooLargeError(max_bytes, declared_length)
+
+        chunks = []
+        received = 0
+        wire_bytes = 0
+        async for wire_chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            wire_bytes += len(wire_chunk)
+            chunk = decoder.decompress(wire_chunk, max_bytes - received)
+            received += len(chunk)
+            if received > max_bytes:
+                if not truncatable:
+                    raise ResponseTooLargeError(max_bytes, received)
+                chunks.append(chunk[: len(chunk) - (received - max_bytes)])
+                logging.warning(
+                    f"Response body truncated to {max_bytes} bytes: {response.url}"
+                )
+                return b"".join(chunks), True, None if session_decodes else wire_bytes
+            chunks.append(chunk)
+
+        tail = decoder.flush()
+        if tail:
+            received += len(tail)
+            if received > max_bytes:
+                if not truncatable:
+                    raise ResponseTooLargeError(max_bytes, received)
+                tail = tail[: len(tail) - (received - max_bytes)]
+                chunks.append(tail)
+                return b"".join(chunks), True, None if session_decodes else wire_bytes
+            chunks.append(tail)
+
+        return b"".join(chunks), False, None if session_decodes else wire_bytes
+
+    def _build_result(self, status, content_type, body: bytes, encoding, url):
+        """Parse a response body into the result dictionary returned by execute"""
+        encoding = (encoding or "utf-8").lower()
 
         # Process response based on content type
         if "application/json" in content_type:
-            # Process JSON response
+            # Process JSON response, parsing UTF-8 bodies directly from bytes
             try:
-                result = json.loads(text)
+                if encoding in ("utf-8", "utf8"):
+                    result = json_codec.loads(body)
+                else:
+                    result = json_codec.loads(body.decode(encoding, errors="replace"))
                 logging.info("Successfully parsed JSON response")
-            except json.JSONDecodeError:
+            except (json_codec.JSONDecodeError, UnicodeDecodeError):
                 logging.warning(
                     "Content-Type declared as JSON but parsing failed, returning raw text"
                 )
+                text = body.decode(encoding, errors="replace")
                 result = {"text": text, "format": "text", "content_type": content_type}
         elif "application/yaml" in content_type or "application/x-yaml" in content_type:
-            # Process YAML response
+            # Process YAML response, reusing the parse of identical interface documents
             try:
-                result = yaml.safe_load(text)
+                result = yaml_codec.loads_cached(body, encoding)
                 logging.info("Successfully parsed YAML response")
                 result = {
                     "data": result,
                     "format": "yaml",
                     "content_type": content_type,
                 }
-            except yaml.YAMLError:
+            except yaml_codec.YAMLError:
                 logging.warning(
                     "Content-Type declared as YAML but parsing failed, returning raw text"
                 )
+                text = body.decode(encoding, errors="replace")
                 result = {"text": text, "format": "text", "content_type": content_type}
         else:
             # Default to text
+            text = body.decode(encoding, errors="replace")
             result = {"text": text, "format": "text", "content_type": content_type}
 
         # Add status code to result
         if isinstance(result, dict):
-            result["status_code"] = response.status
+            result["status_code"] = status
         else:
             result = {
                 "data": result,
-                "status_code": response.status,
+                "status_code": status,
                 "format": "unknown",
                 "content_type": content_type,
             }
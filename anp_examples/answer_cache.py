@@ -0,0 +1,118 @@
+"""
+Process-wide cache of complete simple_crawl answers.
+
+Answers are keyed by the normalized user input, the initial URL, the task type,
+the model and whether document contents were kept, and expire after a TTL. The cache is disabled unless
+ANP_ANSWER_CACHE_TTL is set to a positive number of seconds.
+"""
+import copy
+import logging
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# (normalized query, initial URL, task type, model, whether document contents were kept)
+AnswerKey = Tuple[str, str, str, str, bool]
+
+# Answers kept at most, can be overridden with ANP_ANSWER_CACHE_MAX_ENTRIES
+DEFAULT_MAX_ENTRIES = 256
+
+# Result fields stored in the cache
+CACHED_FIELDS = ("content", "type", "visited_urls", "crawled_documents", "task_type")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a user query so trivially different spellings share a cache entry"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split()).lower()
+
+
+class AnswerCache:
+    """TTL and LRU bounded cache of crawl answers"""
+
+    def __init__(self, ttl: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            ttl (float): Seconds an answer is served from the cache, 0 disables the cache
+            max_entries (int, optional): Answers kept at most, default is 256
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expiry timestamp, stored result)
+        self._entries: "OrderedDict[AnswerKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"hit": 0, "miss": 0, "bypass": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(
+        user_input: str,
+        initial_url: str,
+        task_type: str,
+        model_name: str,
+        keep_documents: bool = True,
+    ) -> AnswerKey:
+        """Cache key of a crawl"""
+        return (
+            normalize_query(user_input),
+            (initial_url or "").strip(),
+            task_type or "",
+            model_name or "",
+            keep_documents,
+        )
+
+    def get(self, key: AnswerKey) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer
+
+        Returns:
+            Optional[Dict[str, Any]]: A copy of the stored result marked as cached, or None
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.stats["miss"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hit"] += 1
+        return {**copy.deepcopy(entry[1]), "cached": True}
+
+    def put(self, key: AnswerKey, result: Dict[str, Any]) -> None:
+        """Store a successful answer; partial answers of stopped crawls are not stored"""
+        if (
+            not self.enabled
+            or result.get("type") != "text"
+            or not result.get("content")
+            or result.get("partial")
+        ):
+            return
+        # Stored as a copy, so the caller may modify its result
+        stored = copy.deepcopy({field: result[field] for field in CACHED_FIELDS if field in result})
+        self._entries[key] = (time.monotonic() + self.ttl, stored)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_answer_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache, configured from the environment on first use"""
+    global _answer_cache
+    if _answer_cache is None:
+        ttl = float(os.environ.get("ANP_ANSWER_CACHE_TTL", 0))
+        max_entries = int(os.environ.get("ANP_ANSWER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        _answer_cache = AnswerCache(ttl, max_entries)
+        if _answer_cache.enabled:
+            logging.info(f"Answer cache enabled - TTL: {ttl}s, max entries: {max_entries}")
+    return _answer_cache
@@ -0,0 +1,283 @@
+"""
+Origin-keyed cache of DID-WBA authentication state used by ANPTool.
+
+Bearer tokens returned by agents are reused until shortly before their JWT
+expiry. DID-WBA headers carry a nonce and timestamp, so they are single-use:
+fresh ones are signed ahead of time in the background for origins whose token
+is about to expire or that are known to require DID-WBA authentication.
+"""
+import asyncio
+import base64
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from agent_connect.authentication import DIDWbaAuthHeader
+
+from anp_examples.metrics import MetricsSink
+from anp_examples.utils import json_codec
+from anp_examples.utils.links import extract_links
+
+# Security scheme name used in ad:securityDefinitions for DID-WBA authentication
+DIDWBA_SCHEME = "didwba"
+
+
+def get_origin(url: str) -> str:
+    """Return scheme://host[:port] of a URL"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+def decode_jwt_expiry(token: str) -> Optional[float]:
+    """
+    Read the exp claim of a JWT without verifying it
+
+    Args:
+        token (str): Encoded JWT
+
+    Returns:
+        Optional[float]: Expiry as a POSIX timestamp, or None if the token has no readable exp claim
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json_codec.loads(base64.urlsafe_b64decode(payload))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def requires_didwba(document: Any) -> bool:
+    """Whether an agent description declares a DID-WBA security scheme"""
+    if not isinstance(document, dict):
+        return False
+    definitions = document.get("ad:securityDefinitions")
+    if not isinstance(definitions, dict):
+        return False
+    return any(
+        isinstance(definition, dict)
+        and str(definition.get("scheme", "")).lower() == DIDWBA_SCHEME
+        for definition in definitions.values()
+    )
+
+
+class DIDAuthCache:
+    """Reuse bearer tokens per origin and keep fresh DID-WBA headers ready"""
+
+    def __init__(
+        self,
+        auth_client: DIDWbaAuthHeader,
+        refresh_margin: float = 60.0,
+        presigned_ttl: float = 60.0,
+        signing_workers: int = 4,
+        metrics_sink: Optional[MetricsSink] = None,
+    ):
+        """
+        Args:
+            auth_client (DIDWbaAuthHeader): Client used to sign DID-WBA headers
+            refresh_margin (float, optional): Seconds before a token's exp at which it is no longer
+                sent. A replacement header is signed in the background twice this far ahead.
+            presigned_ttl (float, optional): Seconds a pre-signed DID-WBA header stays usable
+            signing_workers (int, optional): Threads private-key signing and token parsing run on,
+                so they never block the event loop, default is 4
+            metrics_sink (MetricsSink, optional): Receives the time spent signing as anp.auth.signing_ms
+        """
+        self.auth_client = auth_client
+        self.refresh_margin = refresh_margin
+        self.presigned_ttl = presigned_ttl
+        self.signing_workers = signing_workers
+        self.metrics_sink = metrics_sink or MetricsSink()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Time spent signing inside the worker threads
+        self.signing_stats = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+        # origin -> (token, expiry timestamp or None)
+        self._tokens: Dict[str, Tuple[str, Optional[float]]] = {}
+        # origin -> (DID-WBA header value, signing timestamp)
+        self._presigned: Dict[str, Tuple[str, float]] = {}
+        self._presigning: Dict[str, asyncio.Task] = {}
+        self.didwba_origins = set()
+
+    async def close(self) -> None:
+        """Cancel background signing tasks and stop the signing threads"""
+        tasks = list(self._presigning.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run_in_executor(self, fn: Callable, *args) -> Any:
+        """Run a blocking function on the signing thread pool, creating it on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.signing_workers, thread_name_prefix="did-signing"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _token_for(self, origin: str, now: float) -> Optional[str]:
+        """Return the cached token of an origin if it is not about to expire"""
+        cached = self._tokens.get(origin)
+        if cached is None:
+            return None
+
+        token, expires_at = cached
+        if expires_at is None:
+            return token
+        remaining = expires_at - now
+        if remaining <= self.refresh_margin:
+            del self._tokens[origin]
+            return None
+        if remaining <= 2 * self.refresh_margin:
+            # Sign the replacement header now so switching over costs nothing later
+            self._schedule_presign(origin)
+        return token
+
+    def _pop_presigned(self, origin: str, now: float) -> Optional[str]:
+        """Take a pre-signed header for an origin if one is still valid"""
+        presigned = self._presigned.pop(origin, None)
+        if presigned is None:
+            return None
+        header, signed_at = presigned
+        if now - signed_at > self.presigned_ttl:
+            return None
+        return header
+
+    def _sign_blocking(self, origin: str) -> str:
+        """Sign a new DID-WBA header for an origin, timing the private-key operation"""
+        started = time.perf_counter()
+        try:
+            return self.auth_client.get_auth_header(origin, force_new=True)["Authorization"]
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.signing_stats["count"] += 1
+                self.signing_stats["total_seconds"] += elapsed
+                self.signing_stats["max_seconds"] = max(
+                    self.signing_stats["max_seconds"], elapsed
+                )
+
+    async def _sign(self, origin: str) -> str:
+        """Sign a new DID-WBA header for an origin without blocking the event loop"""
+        started = time.perf_counter()
+        try:
+            return await self._run_in_executor(self._sign_blocking, origin)
+        finally:
+            self.metrics_sink.record(
+                "anp.auth.signing_ms",
+                (time.perf_counter() - started) * 1000,
+                {"origin": origin},
+            )
+
+    async def get_auth_header(self, url: str) -> Dict[str, str]:
+        """
+        Get the Authorization header to send to a URL
+
+        Args:
+            url (str): Request URL
+
+        Returns:
+            Dict[str, str]: HTTP header dictionary
+        """
+        origin = get_origin(url)
+        now = time.time()
+
+        token = self._token_for(origin, now)
+        if token is not None:
+            logging.debug(f"Using cached token for origin {origin}")
+            return {"Authorization": f"Bearer {token}"}
+
+        header = self._pop_presigned(origin, now)
+        if header is not None:
+            logging.debug(f"Using pre-signed DID authentication header for origin {origin}")
+        else:
+            header = await self._sign(origin)
+        return {"Authorization": header}
+
+    async def update_from_response(self, url: str, headers: Dict[str, str]) -> Optional[str]:
+        """
+        Store the bearer token returned in response headers
+
+        Args:
+            url (str): Request URL
+            headers (Dict[str, str]): Response headers
+
+        Returns:
+            Optional[str]: The stored token, or None if the response carried no token
+        """
+        auth_header = headers.get("Authorization")
+        if not auth_header or not auth_header.lower().startswith("bearer "):
+            return None
+
+        origin = get_origin(url)
+        token = auth_header[7:]
+        cached = self._tokens.get(origin)
+        if cached is not None and cached[0] == token:
+            return token
+
+        expires_at = await self._run_in_executor(decode_jwt_expiry, token)
+        self._tokens[origin] = (token, expires_at)
+        self.didwba_origins.add(origin)
+        logging.info(f"Updated token for origin {origin}, expires at {expires_at}")
+        return token
+
+    def invalidate(self, url: str) -> None:
+        """Forget the token and pre-signed header of a URL's origin"""
+        origin = get_origin(url)
+        self._tokens.pop(origin, None)
+        self._presigned.pop(origin, None)
+
+    def prewarm(self, urls: Iterable[str]) -> None:
+        """Sign DID-WBA headers in the background for origins without a usable token"""
+        now = time.time()
+        for url in urls:
+            origin = get_origin(url)
+            if self._token_for(origin, now) is None:
+                self._schedule_presign(origin)
+
+    def note_document(self, url: str, document: Any) -> None:
+        """
+        Pre-negotiate authentication for the hosts of a DID-WBA protected agent description
+
+        Args:
+            url (str): URL the document was fetched from
+            document: Parsed agent description
+        """
+        if not requires_didwba(document):
+            return
+
+        origins = {get_origin(url)}
+        origins.update(get_origin(link) for link in extract_links(document))
+        new_origins = origins - self.didwba_origins
+        if new_origins:
+            logging.info(f"Pre-signing DID authentication for origins: {sorted(new_origins)}")
+            self.didwba_origins.update(new_origins)
+            self.prewarm(new_origins)
+
+    def _schedule_presign(self, origin: str) -> None:
+        """Start signing a header for an origin unless one is ready or being signed"""
+        if origin in self._presigning:
+            return
+        presigned = self._presigned.get(origin)
+        if presigned is not None and time.time() - presigned[1] <= self.presigned_ttl:
+            return
+
+        task = asyncio.ensure_future(self._presign(origin))
+        self._presigning[origin] = task
+        task.add_done_callback(lambda _: self._presigning.pop(origin, None))
+
+    async def _presign(self, origin: str) -> None:
+        """Sign a header for an origin and keep it for the next request"""
+        try:
+            header = await self._sign(origin)
+            self._presigned[origin] = (header, time.time())
+        except Exception as e:
+            logging.warning(f"Failed to pre-sign DID authentication for {origin}: {str(e)}")
@@ -0,0 +1,264 @@
+"""
+Record/replay transport for ANPTool.
+
+In record mode every HTTP exchange ANPTool completes is appended to a JSONL
+cassette file. In replay mode responses are served from the cassette instead
+of the network, optionally after a simulated latency, so crawls can be rerun
+and benchmarked without access to the live agent hosts.
+
+Recorded exchanges are buffered and appended to the file by a worker thread,
+so the event loop never waits on disk I/O; close() writes whatever is still
+buffered. Exchanges are matched on method, URL, query parameters and request body.
+Request headers are not part of the match, and Authorization headers are never
+written to the cassette. Repeated requests are answered with the recorded
+responses in order; the last one is repeated once they are used up.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from anp_examples.utils import json_codec
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Cassette used when ANP_CASSETTE_PATH is not set
+DEFAULT_CASSETTE_PATH = Path(__file__).parent.parent / "cassettes" / "anp_cassette.jsonl"
+
+# Headers that carry credentials and are never stored
+SENSITIVE_HEADERS = ("authorization", "cookie", "set-cookie", "proxy-authorization")
+
+# Headers describing the wire format; recorded bodies are stored decoded
+TRANSPORT_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+# Recorded exchanges buffered before they are written in the background
+FLUSH_EVERY = 20
+
+
+def _match_key(method: str, url, params: Optional[Dict[str, Any]], body: Any) -> Tuple[str, str, str, str]:
+    """Key that identifies a request independently of its headers"""
+    return (
+        method.upper(),
+        str(url),
+        json.dumps(params or {}, sort_keys=True, default=str),
+        json.dumps(body, sort_keys=True, default=str),
+    )
+
+
+class ReplayResponse:
+    """Minimal stand-in for an aiohttp response, built from a recorded exchange"""
+
+    def __init__(self, url, status: int, headers: Dict[str, str], body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.content_length = len(body)
+        self.content = _ReplayStream(body)
+
+    @property
+    def charset(self) -> Optional[str]:
+        """Charset parameter of the Content-Type header"""
+        for part in self.headers.get("Content-Type", "").split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset":
+                return value.strip('"') or None
+        return None
+
+
+class _ReplayStream:
+    """Serves a recorded body through the iter_chunked interface of aiohttp streams"""
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self._body), size):
+            yield self._body[start : start + size]
+
+
+class Cassette:
+    """A JSONL file of recorded ANPTool exchanges"""
+
+    def __init__(self, path, mode: str, replay_latency_ms: float = 0.0):
+        """
+        Args:
+            path: Cassette file. Created on the first recorded exchange.
+            mode (str): "record" or "replay"
+            replay_latency_ms (float, optional): Delay added to every replayed response, default is 0
+
+        Raises:
+            ValueError: If the mode is unknown
+            FileNotFoundError: If a cassette to replay does not exist
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}, expected '{RECORD}' or '{REPLAY}'")
+        self.path = Path(path)
+        self.mode = mode
+        self.replay_latency_ms = replay_latency_ms
+        self._exchanges: Dict[Tuple[str, str, str, str], List[Dict[str, Any]]] = {}
+        self._positions: Dict[Tuple[str, str, str, str], int] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+        # Encoded exchanges not yet written, and the latest scheduled write
+        self._buffer: List[bytes] = []
+        self._writing: Optional[asyncio.Future] = None
+        if mode == REPLAY:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """
+        Build a cassette from ANP_CASSETTE_MODE, ANP_CASSETTE_PATH and ANP_REPLAY_LATENCY_MS
+
+        Returns:
+            Optional[Cassette]: None when ANP_CASSETTE_MODE is not set
+        """
+        mode = os.environ.get("ANP_CASSETTE_MODE", "").strip().lower()
+        if not mode:
+            return None
+        path = os.environ.get("ANP_CASSETTE_PATH") or DEFAULT_CASSETTE_PATH
+        latency = float(os.environ.get("ANP_REPLAY_LATENCY_MS", 0))
+        logging.info(f"ANP cassette enabled - mode: {mode}, path: {path}")
+        return cls(path, mode, replay_latency_ms=latency)
+
+    @property
+    def is_replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @property
+    def is_recording(self) -> bool:
+        return self.mode == RECORD
+
+    def _load(self) -> None:
+        """Read all recorded exchanges, grouped by request"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                exchange = json_codec.loads(line)
+                request = exchange["request"]
+                key = _match_key(
+                    request["method"], request["url"], request.get("params"), request.get("body")
+                )
+                self._exchanges.setdefault(key, []).append(exchange["response"])
+        logging.info(
+            f"Loaded {sum(len(v) for v in self._exchanges.values())} exchanges from cassette {self.path}"
+        )
+
+    def record(
+        self,
+        method: str,
+        url,
+        params: Optional[Dict[str, Any]],
+        body: Any,
+        request_headers: Dict[str, str],
+        status: int,
+        response_headers,
+        response_body: bytes,
+    ) -> None:
+        """
+        Append one exchange to the cassette, writing it in the background
+
+        Args:
+            method (str): HTTP method
+            url: Request URL
+            params (Dict[str, Any], optional): URL query parameters
+            body: JSON request body
+            request_headers (Dict[str, str]): Headers sent, stored without credentials
+            status (int): Response status code
+            response_headers: Response headers
+            response_body (bytes): Decoded response body
+        """
+        try:
+            text = response_body.decode("utf-8")
+            encoded_body = {"body": text}
+        except UnicodeDecodeError:
+            encoded_body = {"body_base64": base64.b64encode(response_body).decode("ascii")}
+
+        exchange = {
+            "request": {
+                "method": method.upper(),
+                "url": str(url),
+                "params": params or {},
+                "body": body,
+                "headers": {
+                    k: v for k, v in request_headers.items() if k.lower() not in SENSITIVE_HEADERS
+                },
+            },
+            "response": {
+                "status": status,
+                "headers": {
+                    k: v
+                    for k, v in response_headers.items()
+                    if k.lower() not in SENSITIVE_HEADERS + TRANSPORT_HEADERS
+                },
+                **encoded_body,
+            },
+        }
+        self._buffer.append(json_codec.dumps_bytes(exchange) + b"\n")
+        self.stats["recorded"] += 1
+        if len(self._buffer) >= FLUSH_EVERY:
+            self._schedule_write()
+
+    async def flush(self) -> None:
+        """Write every buffered exchange to the cassette file"""
+        if self._buffer:
+            self._schedule_write()
+        if self._writing is not None:
+            await self._writing
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def _schedule_write(self) -> None:
+        """Hand the buffered exchanges to a worker thread, after any earlier write"""
+        lines, self._buffer = self._buffer, []
+        self._writing = asyncio.ensure_future(self._write_after(self._writing, lines))
+
+    async def _write_after(self, previous: Optional[asyncio.Future], lines: List[bytes]) -> None:
+        # Writes run one after another so the file keeps the recording order
+        if previous is not None:
+            await previous
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._append, lines)
+        except OSError as e:
+            logging.error(f"Failed to write {len(lines)} exchanges to cassette {self.path}: {str(e)}")
+
+    def _append(self, lines: List[bytes]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.writelines(lines)
+
+    async def replay(
+        self, method: str, url, params: Optional[Dict[str, Any]], body: Any
+    ) -> Optional[ReplayResponse]:
+        """
+        Serve the next recorded response for a request
+
+        Returns:
+            Optional[ReplayResponse]: None if the request was never recorded
+        """
+        key = _match_key(method, url, params, body)
+        responses = self._exchanges.get(key)
+        if not responses:
+            self.stats["missed"] += 1
+            logging.warning(f"No recorded response in cassette for {method} {url}")
+            return None
+
+        position = self._positions.get(key, 0)
+        recorded = responses[min(position, len(responses) - 1)]
+        self._positions[key] = position + 1
+
+        if self.replay_latency_ms > 0:
+            await asyncio.sleep(self.replay_latency_ms / 1000)
+        if "body_base64" in recorded:
+            response_body = base64.b64decode(recorded["body_base64"])
+        else:
+            response_body = recorded.get("body", "").encode("utf-8")
+        self.stats["replayed"] += 1
+        return ReplayResponse(url, recorded["status"], recorded["headers"], response_body)
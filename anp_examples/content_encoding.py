@@ -0,0 +1,163 @@
+"""
+Streaming decompression of HTTP response bodies used by ANPTool.
+
+gzip and deflate are always supported. brotli and zstd are offered to servers
+only when the brotli (or brotlicffi) and zstandard packages are installed, and
+brotli only in versions whose decoder can bound its output (brotli 1.2+).
+Bodies are decoded chunk by chunk, and no decoder produces much more than the
+bytes the caller still accepts, so the decoded size is capped while the
+response is still streaming. This protects against decompression bombs.
+"""
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Older brotli bindings decode a whole chunk at once, however large its output
+if brotli is not None and not hasattr(brotli.Decompressor, "can_accept_more_data"):
+    brotli = None
+
+# Content codings that can be decoded, in order of preference
+SUPPORTED_ENCODINGS = tuple(
+    encoding
+    for encoding, available in (
+        ("zstd", zstandard is not None),
+        ("br", brotli is not None),
+        ("gzip", True),
+        ("deflate", True),
+    )
+    if available
+)
+
+# Value of the Accept-Encoding request header
+ACCEPT_ENCODING = ", ".join(SUPPORTED_ENCODINGS)
+
+
+class DecompressionError(Exception):
+    """Raised when a response body uses an unsupported or corrupt content coding"""
+
+
+class _OutputLimitReached(Exception):
+    """Stops a zstd decoder once its output exceeds the limit"""
+
+
+class _BoundedSink:
+    """Collects zstd output, stopping the decoder once more than limit bytes were written"""
+
+    def __init__(self):
+        self.limit = 0
+        self.size = 0
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        if self.size > self.limit:
+            raise _OutputLimitReached()
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+class StreamDecoder:
+    """Incrementally decodes one response body"""
+
+    def __init__(self, content_encoding: Optional[str]):
+        """
+        Args:
+            content_encoding (str, optional): Content-Encoding header of the response
+
+        Raises:
+            DecompressionError: If the coding is not supported
+        """
+        self.encoding = (content_encoding or "identity").strip().lower()
+        if self.encoding == "x-gzip":
+            self.encoding = "gzip"
+
+        if self.encoding == "identity":
+            self._decoder = None
+        elif self.encoding == "gzip":
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "deflate":
+            # Wrapped (RFC 1950) or raw deflate, decided on the first chunk
+            self._decoder = None
+        elif self.encoding == "br" and brotli is not None:
+            self._decoder = brotli.Decompressor()
+        elif self.encoding == "zstd" and zstandard is not None:
+            # The writer hands output to the sink in blocks of at most write_size bytes
+            self._sink = _BoundedSink()
+            self._decoder = zstandard.ZstdDecompressor().stream_writer(self._sink)
+        else:
+            raise DecompressionError(f"Unsupported Content-Encoding: {content_encoding}")
+
+    @property
+    def is_identity(self) -> bool:
+        """Whether the body is sent without a content coding"""
+        return self.encoding == "identity"
+
+    def decompress(self, chunk: bytes, max_length: int) -> bytes:
+        """
+        Decode the next chunk of the body
+
+        Args:
+            chunk (bytes): Bytes as received on the wire
+            max_length (int): Decoded bytes the caller still accepts. Decoding stops
+                once the output exceeds this limit, brotli and zstd at the end of their
+                current output buffer. The body must not be decoded further after that.
+
+        Returns:
+            bytes: Decoded bytes, longer than max_length if the limit was exceeded
+
+        Raises:
+            DecompressionError: If the chunk cannot be decoded
+        """
+        if self.is_identity:
+            return chunk
+        try:
+            if self.encoding == "deflate" and self._decoder is None:
+                self._decoder = zlib.decompressobj(self._deflate_wbits(chunk))
+            if self.encoding in ("gzip", "deflate"):
+                # Input left over past the limit stays in unconsumed_tail and is never decoded
+                return self._decoder.decompress(chunk, max_length + 1)
+            if self.encoding == "br":
+                return self._decoder.process(chunk, output_buffer_limit=max_length + 1)
+            self._sink.limit = max_length
+            try:
+                self._decoder.write(chunk)
+            except _OutputLimitReached:
+                pass
+            return self._sink.take()
+        except Exception as e:
+            # zlib.error, brotli.error and zstandard.ZstdError share no common base class
+            raise DecompressionError(f"Failed to decode {self.encoding} body: {str(e)}") from e
+
+    def flush(self) -> bytes:
+        """Return any decoded bytes still buffered once the body is complete"""
+        if self.encoding in ("gzip", "deflate") and self._decoder is not None:
+            try:
+                return self._decoder.flush()
+            except zlib.error as e:
+                raise DecompressionError(f"Failed to decode {self.encoding} body: {str(e)}") from e
+        return b""
+
+    @staticmethod
+    def _deflate_wbits(chunk: bytes) -> int:
+        """Window bits for a deflate body: zlib-wrapped if the header checks out, raw otherwise"""
+        if len(chunk) >= 2 and (chunk[0] & 0x0F) == 8 and ((chunk[0] << 8) | chunk[1]) % 31 == 0:
+            return zlib.MAX_WBITS
+        return -zlib.MAX_WBITS
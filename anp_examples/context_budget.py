@@ -0,0 +1,185 @@
+"""
+Token budget for the simple_crawl message history.
+
+Token counts are estimated locally without a tokenizer. Once the history
+exceeds the budget, the oldest tool results are replaced by short digests that
+keep the document's URL, status and links, so the model can still navigate
+and can fetch a document again if it needs the details. The leading system and
+user messages and the most recent turns are never compacted.
+
+A digest is computed once per tool call and reused, so compacted history stays
+byte-identical from one model call to the next.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from anp_examples.utils import json_codec
+from anp_examples.utils.links import extract_links
+
+# Default budget of the message history, can be overridden with ANP_CONTEXT_TOKEN_BUDGET
+DEFAULT_CONTEXT_TOKEN_BUDGET = 60000
+
+# Tokens added per message for role and formatting
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Links kept in a digest
+MAX_DIGEST_LINKS = 30
+
+# Characters of a non-JSON tool result kept in a digest
+MAX_DIGEST_TEXT = 200
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Estimate the token count of a text
+
+    CJK characters count as one token each, other text as one token per four characters.
+    """
+    if not text:
+        return 0
+    wide = sum(1 for char in text if ord(char) >= 0x2E80)
+    return wide + (len(text) - wide + 3) // 4
+
+
+def _tool_call_arguments(tool_call: Any) -> str:
+    """Arguments of a tool call given as an API object or a dictionary"""
+    if isinstance(tool_call, dict):
+        return tool_call.get("function", {}).get("arguments", "")
+    return tool_call.function.arguments or ""
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Estimate the tokens a chat message adds to a request"""
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content"))
+    for tool_call in message.get("tool_calls") or []:
+        tokens += MESSAGE_OVERHEAD_TOKENS + estimate_tokens(_tool_call_arguments(tool_call))
+    return tokens
+
+
+def digest_tool_result(content: str) -> str:
+    """
+    Compact digest of a tool result that keeps what is needed to navigate further
+
+    Args:
+        content (str): Tool message content, usually a JSON encoded ANPTool result
+
+    Returns:
+        str: JSON encoded digest
+    """
+    digest: Dict[str, Any] = {"compacted": True}
+    try:
+        document = json_codec.loads(content)
+    except json_codec.JSONDecodeError:
+        document = None
+
+    if isinstance(document, dict):
+        for field in ("url", "status_code", "error", "name", "@type"):
+            if field in document:
+                digest[field] = document[field]
+        links = sorted(extract_links(document))
+        if links:
+            digest["links"] = links[:MAX_DIGEST_LINKS]
+            if len(links) > MAX_DIGEST_LINKS:
+                digest["links_omitted"] = len(links) - MAX_DIGEST_LINKS
+    else:
+        digest["text"] = content[:MAX_DIGEST_TEXT]
+
+    digest["note"] = "Full content omitted to save context; request the URL again if the details are needed."
+    return json_codec.dumps(digest)
+
+
+class ContextBudget:
+    """Keeps a message history within a token budget by compacting old tool results"""
+
+    def __init__(self, max_tokens: int, keep_recent_turns: int = 2):
+        """
+        Args:
+            max_tokens (int): Token budget of the history, 0 disables compaction
+            keep_recent_turns (int, optional): Most recent assistant turns, with their tool
+                results, that are never compacted, default is 2
+        """
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        # tool_call_id -> digest, so a result is always compacted to the same text
+        self._digests: Dict[str, str] = {}
+        self.stats = {"compacted_messages": 0, "saved_tokens": 0}
+
+    def total_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        """Estimated tokens of a message history"""
+        return sum(message_tokens(message) for message in messages)
+
+    def _protected_from(self, messages: List[Dict[str, Any]]) -> int:
+        """Index of the first message of the turns that are kept intact"""
+        if self.keep_recent_turns <= 0:
+            return len(messages)
+        assistant_indexes = [
+            i for i, message in enumerate(messages) if message.get("role") == "assistant"
+        ]
+        if len(assistant_indexes) < self.keep_recent_turns:
+            return 0
+        return assistant_indexes[-self.keep_recent_turns]
+
+    def compact(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Replace the oldest tool results with digests until the history fits the budget
+
+        Messages are modified in place. Results compacted earlier are compacted again
+        with the same digest, keeping the history prefix stable.
+
+        Args:
+            messages: Chat message history
+
+        Returns:
+            int: Estimated tokens saved by this call
+        """
+        if self.max_tokens <= 0:
+            return 0
+
+        saved = 0
+        # Results compacted before stay compacted, whatever the current total
+        for message in messages:
+            digest = self._digests.get(message.get("tool_call_id"))
+            if message.get("role") == "tool" and digest is not None and message["content"] != digest:
+                saved += self._replace(message, digest)
+
+        total = self.total_tokens(messages)
+        if total <= self.max_tokens:
+            return saved
+
+        protected_from = self._protected_from(messages)
+        for message in messages[:protected_from]:
+            if total <= self.max_tokens:
+                break
+            if message.get("role") != "tool" or message.get("tool_call_id") in self._digests:
+                continue
+            content = message.get("content") or ""
+            digest = digest_tool_result(content)
+            if estimate_tokens(digest) >= estimate_tokens(content):
+                # Small results are kept as they are
+                self._digests[message.get("tool_call_id")] = content
+                continue
+            self._digests[message.get("tool_call_id")] = digest
+            reduced = self._replace(message, digest)
+            total -= reduced
+            saved += reduced
+
+        if saved:
+            logging.info(
+                f"Compacted message history by about {saved} tokens, now about {total} tokens "
+                f"(budget {self.max_tokens})"
+            )
+        if total > self.max_tokens:
+            logging.warning(
+                f"Message history of about {total} tokens exceeds the budget of "
+                f"{self.max_tokens} tokens after compaction"
+            )
+        return saved
+
+    def _replace(self, message: Dict[str, Any], digest: str) -> int:
+        """Swap a tool message's content for its digest, returning the tokens saved"""
+        before = message_tokens(message)
+        message["content"] = digest
+        reduced = max(before - message_tokens(message), 0)
+        self.stats["compacted_messages"] += 1
+        self.stats["saved_tokens"] += reduced
+        return reduced
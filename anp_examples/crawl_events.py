@@ -0,0 +1,84 @@
+"""
+Events yielded by simple_crawl_iter.
+
+Every event has a name, used as the server-sent event name, and data(), the
+JSON-serializable payload sent to clients. Document events carry the full
+document content; data() only summarizes it.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import Any, ClassVar, Dict, List, Optional
+
+
+@dataclass
+class CrawlEvent:
+    """Base class of crawl events"""
+
+    name: ClassVar[str] = "event"
+
+    def data(self) -> Dict[str, Any]:
+        """Payload of the event sent to clients"""
+        return asdict(self)
+
+
+@dataclass
+class ToolCallEvent(CrawlEvent):
+    """The model requested a URL and the crawl is about to fetch it"""
+
+    name: ClassVar[str] = "tool_call"
+    id: str
+    url: str
+    method: str = "GET"
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class DocumentEvent(CrawlEvent):
+    """A document was fetched, or fetching it failed"""
+
+    name: ClassVar[str] = "document"
+    url: str
+    method: str
+    content: Dict[str, Any]
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.content.get("error") if isinstance(self.content, dict) else None
+
+    def data(self) -> Dict[str, Any]:
+        event = {"url": self.url, "method": self.method, "status_code": self.content.get("status_code")}
+        if self.error is not None:
+            event["error"] = self.error
+        return event
+
+
+@dataclass
+class TokenEvent(CrawlEvent):
+    """A fragment of model output, sent while the model response is streamed"""
+
+    name: ClassVar[str] = "token"
+    content: str
+
+
+@dataclass
+class ModelMessageEvent(CrawlEvent):
+    """The model finished a response"""
+
+    name: ClassVar[str] = "model_message"
+    iteration: int
+    content: Optional[str]
+    # {"id", "url", "method"} of every requested tool call
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    # Token counts of the call, see crawl_metrics.usage_counts
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class FinalAnswerEvent(CrawlEvent):
+    """The crawl finished; always the last event"""
+
+    name: ClassVar[str] = "final"
+    # Crawl result, as returned by simple_crawl
+    result: Dict[str, Any]
+
+    def data(self) -> Dict[str, Any]:
+        return self.result
@@ -0,0 +1,119 @@
+"""
+Per-iteration timing and token accounting of a simple_crawl run.
+
+An iteration is one model call followed by the tool calls it requested.
+Fetch latency is the time the crawl waited for a document, so documents
+served from the prefetcher or the HTTP cache show up as near zero.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from anp_examples.metrics import elapsed_ms
+
+# Token counters taken from completion.usage
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens")
+
+
+def usage_counts(usage: Any) -> Dict[str, int]:
+    """
+    Token counts of a model call
+
+    Args:
+        usage: completion.usage of a chat completion, or None if the provider sent none
+
+    Returns:
+        Dict[str, int]: prompt, completion, total and cached prompt tokens
+    """
+    if usage is None:
+        return {field: 0 for field in TOKEN_FIELDS}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "total_tokens": usage.total_tokens or 0,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details is not None else 0,
+    }
+
+
+def fetch_metrics(url: str, method: str, result: Any, fetch_ms: float) -> Dict[str, Any]:
+    """
+    Metrics of one fetched document
+
+    Args:
+        url (str): Requested URL
+        method (str): HTTP method
+        result: Result returned by ANPTool.execute
+        fetch_ms (float): Milliseconds the crawl waited for the result
+
+    Returns:
+        Dict[str, Any]: url, method, fetch_ms, bytes, status_code and how the result was served
+    """
+    result = result if isinstance(result, dict) else {}
+    timing = result.get("timing") or {}
+    entry = {
+        "url": url,
+        "method": method,
+        "fetch_ms": fetch_ms,
+        "bytes": timing.get("bytes", 0),
+        "status_code": result.get("status_code"),
+    }
+    if "error" in result:
+        entry["error_type"] = result.get("error_type", "error")
+    if result.get("prefetched"):
+        entry["source"] = "prefetch"
+    elif result.get("cache") not in (None, "miss"):
+        entry["source"] = f"cache:{result['cache']}"
+    elif result.get("coalesced"):
+        entry["source"] = "coalesced"
+    else:
+        entry["source"] = "network"
+    return entry
+
+
+class CrawlMetrics:
+    """Collects the metrics section of a simple_crawl result"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.initial_fetch: Optional[Dict[str, Any]] = None
+        self.iterations: List[Dict[str, Any]] = []
+
+    def add_iteration(self, llm_ms: float, usage: Any) -> Dict[str, Any]:
+        """
+        Record a model call as the start of a new iteration
+
+        Returns:
+            Dict[str, Any]: The iteration entry, whose "tool_calls" list and "tool_ms" are
+                filled in by the caller
+        """
+        iteration = {
+            "iteration": len(self.iterations) + 1,
+            "llm_ms": llm_ms,
+            **usage_counts(usage),
+            "tool_ms": 0.0,
+            "tool_calls": [],
+        }
+        self.iterations.append(iteration)
+        return iteration
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Metrics section with totals over all iterations"""
+        fetches = [call for iteration in self.iterations for call in iteration["tool_calls"]]
+        if self.initial_fetch is not None:
+            fetches.insert(0, self.initial_fetch)
+        totals = {
+            "total_ms": elapsed_ms(self.started),
+            "llm_calls": len(self.iterations),
+            "llm_ms": round(sum(iteration["llm_ms"] for iteration in self.iterations), 2),
+            "tool_ms": round(sum(iteration["tool_ms"] for iteration in self.iterations), 2),
+            "fetches": len(fetches),
+            "fetch_ms": round(sum(fetch["fetch_ms"] for fetch in fetches), 2),
+            "bytes": sum(fetch["bytes"] or 0 for fetch in fetches),
+        }
+        for field in TOKEN_FIELDS:
+            totals[field] = sum(iteration[field] for iteration in self.iterations)
+        return {
+            "initial_fetch": self.initial_fetch,
+            "iterations": self.iterations,
+            "totals": totals,
+        }
@@ -0,0 +1,67 @@
+"""
+Wall-clock deadline and token budget of a simple_crawl run.
+
+The last part of the time budget is reserved for a final summarization turn,
+so a crawl that runs out of time still answers from what it has collected.
+"""
+import time
+from typing import Optional
+
+# Seconds a crawl may take, below the 600s proxy timeout of nginx_config.conf.
+# Can be overridden with ANP_CRAWL_TIMEOUT; 0 disables the deadline.
+DEFAULT_CRAWL_TIMEOUT = 540.0
+
+# Seconds reserved for the final summarization turn, can be overridden with
+# ANP_SUMMARY_RESERVE. At most a quarter of the whole timeout is reserved.
+DEFAULT_SUMMARY_RESERVE = 30.0
+
+
+class CrawlDeadline:
+    """Tracks the time and tokens left to a crawl"""
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        token_budget: int = 0,
+        summary_reserve: float = DEFAULT_SUMMARY_RESERVE,
+    ):
+        """
+        Args:
+            timeout (float, optional): Seconds the crawl may take. None or 0 means no deadline.
+            token_budget (int, optional): Prompt and completion tokens the model calls may
+                use together, 0 means no budget
+            summary_reserve (float, optional): Seconds kept for the final summarization turn
+        """
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.expires_at = time.monotonic() + self.timeout if self.timeout else None
+        self.token_budget = token_budget
+        self.summary_reserve = min(summary_reserve, self.timeout / 4) if self.timeout else 0.0
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def remaining_for_crawling(self) -> Optional[float]:
+        """Seconds left for model and tool calls before the summarization turn must start"""
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        return max(remaining - self.summary_reserve, 0.0)
+
+    def stop_reason(self, used_tokens: int) -> Optional[str]:
+        """
+        Why crawling must stop now, if it must
+
+        Args:
+            used_tokens (int): Tokens the crawl's model calls have used so far
+
+        Returns:
+            Optional[str]: "deadline" or "token_budget", or None to continue
+        """
+        if self.expires_at is not None and self.remaining_for_crawling() <= 0:
+            return "deadline"
+        if self.token_budget > 0 and used_tokens >= self.token_budget:
+            return "token_budget"
+        return None
@@ -0,0 +1,272 @@
+"""
+In-memory HTTP response cache used by ANPTool.
+
+Responses are stored as raw bodies in a byte-budgeted LRU and are re-parsed on
+every hit, so callers never share mutable result dictionaries.
+"""
+import time
+import logging
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Parse a Cache-Control header into a directive dictionary
+
+    Args:
+        value (str, optional): Raw header value, e.g. "max-age=60, stale-while-revalidate=30"
+
+    Returns:
+        Dict[str, Optional[str]]: Lower-cased directive names mapped to their values (None for flags)
+    """
+    directives = {}
+    if not value:
+        return directives
+
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') if arg else None
+    return directives
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[int]:
+    """Parse a delta-seconds directive value, returning None when invalid"""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    """Parse an HTTP date header into a POSIX timestamp"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str]) -> Tuple[Optional[float], int, bool]:
+    """
+    Compute how long a response may be served from cache
+
+    Args:
+        headers (Dict[str, str]): Response headers
+
+    Returns:
+        Tuple[Optional[float], int, bool]: (fresh lifetime in seconds or None if the response
+            must not be stored, stale-while-revalidate window in seconds, whether every use
+            must be revalidated first)
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None, 0, False
+    # The response depends on more than the request, so no stored copy can be reused
+    if headers.get("Vary", "").strip() == "*":
+        return None, 0, False
+
+    must_revalidate = "no-cache" in directives
+    stale_window = _parse_seconds(directives.get("stale-while-revalidate")) or 0
+
+    lifetime = _parse_seconds(directives.get("max-age"))
+    if lifetime is None:
+        expires = _parse_http_date(headers.get("Expires"))
+        if expires is not None:
+            date = _parse_http_date(headers.get("Date")) or time.time()
+            lifetime = max(expires - date, 0)
+        else:
+            lifetime = 0
+
+    # Time the response already spent in upstream caches counts against freshness
+    age = _parse_seconds(headers.get("Age")) or 0
+    lifetime = max(lifetime - age, 0)
+
+    if must_revalidate:
+        lifetime = 0
+        stale_window = 0
+
+    return lifetime, stale_window, must_revalidate
+
+
+class CacheEntry:
+    """A cached response body together with its freshness and validators"""
+
+    def __init__(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        encoding: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        fresh_until: float,
+        stale_until: float,
+    ):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+    @property
+    def size(self) -> int:
+        """Approximate memory cost of the entry in bytes"""
+        return len(self.body) + 256
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Whether the entry can be served without contacting the origin"""
+        return (now or time.monotonic()) < self.fresh_until
+
+    def is_stale_usable(self, now: Optional[float] = None) -> bool:
+        """Whether the entry can be served while it is revalidated in the background"""
+        return (now or time.monotonic()) < self.stale_until
+
+    def has_validators(self) -> bool:
+        """Whether the entry can be revalidated with a conditional request"""
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that revalidate this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def refresh(self, headers: Dict[str, str]) -> bool:
+        """
+        Update freshness and validators from the headers of a 304 response
+
+        Returns:
+            bool: False if the new headers forbid storing the entry
+        """
+        lifetime, stale_window, _ = freshness_lifetime(headers)
+        if lifetime is None:
+            return False
+
+        now = time.monotonic()
+        self.fresh_until = now + lifetime
+        self.stale_until = self.fresh_until + stale_window
+        self.etag = headers.get("ETag", self.etag)
+        self.last_modified = headers.get("Last-Modified", self.last_modified)
+        return True
+
+    @classmethod
+    def from_response(
+        cls,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        content_type: str,
+        encoding: str,
+    ) -> Optional["CacheEntry"]:
+        """
+        Build a cache entry from a response, or None if it is not worth storing
+
+        A response is stored when it is fresh for some time, may be served stale,
+        or carries validators that allow a cheap conditional refresh.
+        """
+        lifetime, stale_window, _ = freshness_lifetime(headers)
+        if lifetime is None:
+            return None
+
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if lifetime <= 0 and stale_window <= 0 and not (etag or last_modified):
+            return None
+
+        now = time.monotonic()
+        return cls(
+            status=status,
+            body=body,
+            content_type=content_type,
+            encoding=encoding,
+            etag=etag,
+            last_modified=last_modified,
+            fresh_until=now + lifetime,
+            stale_until=now + lifetime + stale_window,
+        )
+
+
+class HTTPCache:
+    """Byte-budgeted LRU cache of HTTP responses"""
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes (int): Total body bytes the cache may hold
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Any, CacheEntry]" = OrderedDict()
+        self.stats = {
+            "hit": 0,
+            "stale": 0,
+            "revalidated": 0,
+            "miss": 0,
+            "bypass": 0,
+            "coalesced": 0,
+            "evictions": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Optional[CacheEntry]:
+        """Look up an entry and mark it as most recently used"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Any, entry: CacheEntry) -> None:
+        """Store an entry, evicting least recently used entries to stay within budget"""
+        if entry.size > self.max_bytes:
+            logging.debug(f"Response too large to cache: {entry.size} bytes")
+            self.invalidate(key)
+            return
+
+        self.invalidate(key)
+        self._entries[key] = entry
+        self.current_bytes += entry.size
+
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key: Any) -> None:
+        """Remove an entry if present"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome (hit, stale, revalidated, miss, bypass or coalesced)"""
+        self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def hit_ratio(self) -> float:
+        """Share of lookups answered without downloading the body again"""
+        served = (
+            self.stats["hit"]
+            + self.stats["stale"]
+            + self.stats["revalidated"]
+            + self.stats["coalesced"]
+        )
+        total = served + self.stats["miss"]
+        return served / total if total else 0.0
@@ -0,0 +1,159 @@
+"""
+Process-wide registry of LLM clients used by simple_crawl.
+
+Clients are created once per model provider and base URL, so their httpx
+connection pools (and TLS sessions to the provider) are reused across crawls.
+Call close_llm_clients() on application shutdown. set_llm_client() replaces
+the registry's client, e.g. with a fake client in tests or benchmarks.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from config import (
+    DASHSCOPE_API_KEY,
+    DASHSCOPE_BASE_URL,
+    DASHSCOPE_MODEL_NAME,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OPENAI_MODEL,
+)
+
+# Connections kept open to one provider, can be overridden with ANP_LLM_MAX_CONNECTIONS
+DEFAULT_MAX_CONNECTIONS = 20
+
+# Seconds allowed for one model call, can be overridden with ANP_LLM_TIMEOUT
+DEFAULT_TIMEOUT = 120.0
+
+# Seconds allowed to connect to the provider
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+# Seconds an idle provider connection is kept alive
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+# (provider, base_url) -> (client, event loop the client's pool belongs to)
+_clients: Dict[Tuple[str, str], Tuple[AsyncOpenAI, Any]] = {}
+
+# Client and model name set with set_llm_client, used instead of the registry
+_override: Optional[Tuple[Any, str]] = None
+
+
+def _provider_config(provider: str) -> Tuple[str, str, str]:
+    """Return (api_key, base_url, model_name) of a model provider"""
+    if provider == "dashscope":
+        return DASHSCOPE_API_KEY, DASHSCOPE_BASE_URL, DASHSCOPE_MODEL_NAME
+    if provider == "openai":
+        return OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL
+    raise ValueError(f"Unsupported MODEL_PROVIDER: {provider}")
+
+
+def _create_client(provider: str, api_key: str, base_url: str) -> AsyncOpenAI:
+    """Create a client with a pooled HTTP connection to the provider"""
+    max_connections = int(
+        os.environ.get("ANP_LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)
+    )
+    timeout = float(os.environ.get("ANP_LLM_TIMEOUT", DEFAULT_TIMEOUT))
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(timeout, connect=DEFAULT_CONNECT_TIMEOUT),
+    )
+
+    client_kwargs = {"api_key": api_key, "base_url": base_url, "http_client": http_client}
+    if provider == "openai" and "openai.azure.com" in base_url.lower():
+        # 检测是否为Azure OpenAI并相应配置
+        logging.info("检测到Azure OpenAI配置，使用Azure兼容模式")
+        client_kwargs["default_headers"] = {"api-key": api_key}  # Azure特有的认证header
+        client_kwargs["default_query"] = {"api-version": "2024-02-01"}  # Azure必需的API版本
+    logging.info(
+        f"Created LLM client - provider: {provider}, base URL: {base_url}, "
+        f"max connections: {max_connections}, timeout: {timeout}s"
+    )
+    return AsyncOpenAI(**client_kwargs)
+
+
+def resolve_model_name(provider: Optional[str] = None) -> str:
+    """
+    Return the model name get_llm_client would use, without creating a client
+
+    Args:
+        provider (str, optional): "dashscope" or "openai". If None, uses MODEL_PROVIDER
+            (default "dashscope").
+
+    Raises:
+        ValueError: If the provider is not supported
+    """
+    if _override is not None:
+        return _override[1]
+    if provider is None:
+        provider = os.getenv("MODEL_PROVIDER", "dashscope")
+    return _provider_config(provider.lower())[2]
+
+
+def get_llm_client(provider: Optional[str] = None) -> Tuple[Any, str]:
+    """
+    Return the shared client and model name of a model provider
+
+    Args:
+        provider (str, optional): "dashscope" or "openai". If None, uses MODEL_PROVIDER
+            (default "dashscope").
+
+    Returns:
+        Tuple[AsyncOpenAI, str]: (client, model name)
+
+    Raises:
+        ValueError: If the provider is not supported
+    """
+    if _override is not None:
+        return _override
+
+    if provider is None:
+        provider = os.getenv("MODEL_PROVIDER", "dashscope")
+    provider = provider.lower()
+    api_key, base_url, model_name = _provider_config(provider)
+
+    key = (provider, base_url)
+    loop = asyncio.get_running_loop()
+    cached = _clients.get(key)
+    # httpx pools are bound to the event loop they were first used on
+    if cached is None or cached[1] is not loop or cached[1].is_closed():
+        _clients[key] = (_create_client(provider, api_key, base_url), loop)
+    return _clients[key][0], model_name
+
+
+def set_llm_client(client: Any, model_name: Optional[str] = None) -> None:
+    """
+    Use the given client for every provider instead of the registry's clients
+
+    Args:
+        client: AsyncOpenAI compatible client, or None to go back to the registry
+        model_name (str, optional): Model to request. If None, uses the model configured
+            for MODEL_PROVIDER.
+
+    The caller stays responsible for closing an injected client.
+    """
+    global _override
+    if client is None:
+        _override = None
+        return
+    if model_name is None:
+        model_name = _provider_config(os.getenv("MODEL_PROVIDER", "dashscope").lower())[2]
+    _override = (client, model_name)
+
+
+async def close_llm_clients() -> None:
+    """Close the connection pools of all clients created by the registry"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client, loop in clients:
+        if loop is asyncio.get_running_loop():
+            await client.close()
+    if clients:
+        logging.info(f"Closed {len(clients)} LLM clients")
@@ -0,0 +1,149 @@
+"""
+Request timing instrumentation and pluggable metrics sinks for ANPTool.
+
+Phase timings are collected with an aiohttp TraceConfig into a per-request
+dictionary passed as trace_request_ctx. TLS handshakes are part of the
+connection phase, since aiohttp does not report them separately.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+
+class MetricsSink:
+    """Receives numeric measurements; the base class discards them"""
+
+    def record(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        """
+        Record one measurement
+
+        Args:
+            name (str): Metric name, e.g. "anp.request.total_ms"
+            value (float): Measured value
+            tags (Dict[str, str], optional): Dimensions such as host or status code
+        """
+
+
+class LoggingMetricsSink(MetricsSink):
+    """Writes every measurement to the debug log"""
+
+    def record(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        logging.debug(f"metric {name}={value} {tags or {}}")
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """Aggregates count, sum and max per metric name and tag set"""
+
+    def __init__(self):
+        self.metrics: Dict[Any, Dict[str, float]] = {}
+
+    def record(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        key = (name, tuple(sorted((tags or {}).items())))
+        aggregate = self.metrics.setdefault(key, {"count": 0, "sum": 0.0, "max": value})
+        aggregate["count"] += 1
+        aggregate["sum"] += value
+        aggregate["max"] = max(aggregate["max"], value)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregates per metric name across all tag sets, with the mean added"""
+        summary: Dict[str, Dict[str, float]] = {}
+        for (name, _), aggregate in self.metrics.items():
+            merged = summary.setdefault(name, {"count": 0, "sum": 0.0, "max": aggregate["max"]})
+            merged["count"] += aggregate["count"]
+            merged["sum"] += aggregate["sum"]
+            merged["max"] = max(merged["max"], aggregate["max"])
+        for merged in summary.values():
+            merged["mean"] = merged["sum"] / merged["count"] if merged["count"] else 0.0
+        return summary
+
+
+def elapsed_ms(started: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _timing(trace_config_ctx) -> Optional[Dict[str, Any]]:
+    """Return the timing dictionary of a traced request, if one was passed"""
+    timing = trace_config_ctx.trace_request_ctx
+    return timing if isinstance(timing, dict) else None
+
+
+async def _on_request_start(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None:
+        timing["_started"] = time.perf_counter()
+        timing.setdefault("connection_reused", False)
+
+
+async def _on_connection_queued_start(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None:
+        timing["_queued"] = time.perf_counter()
+
+
+async def _on_connection_queued_end(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None and "_queued" in timing:
+        timing["queue_ms"] = elapsed_ms(timing.pop("_queued"))
+
+
+async def _on_dns_resolvehost_start(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None:
+        timing["_dns"] = time.perf_counter()
+
+
+async def _on_dns_resolvehost_end(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None and "_dns" in timing:
+        timing["dns_ms"] = elapsed_ms(timing.pop("_dns"))
+
+
+async def _on_connection_create_start(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None:
+        timing["_connect"] = time.perf_counter()
+
+
+async def _on_connection_create_end(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None and "_connect" in timing:
+        # Includes DNS resolution and the TLS handshake
+        timing["connect_ms"] = elapsed_ms(timing.pop("_connect"))
+
+
+async def _on_connection_reuseconn(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None:
+        timing["connection_reused"] = True
+
+
+async def _on_request_end(session, trace_config_ctx, params):
+    timing = _timing(trace_config_ctx)
+    if timing is not None and "_started" in timing:
+        # Fired once the response status line and headers have arrived
+        timing["ttfb_ms"] = elapsed_ms(timing["_started"])
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Build the TraceConfig that fills per-request timing dictionaries"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_queued_start.append(_on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(_on_connection_queued_end)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+def finish_timing(timing: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop internal timestamps from a timing dictionary before it is returned"""
+    for key in [key for key in timing if key.startswith("_")]:
+        del timing[key]
+    return timing
@@ -0,0 +1,146 @@
+"""
+Speculative prefetching of linked documents during a crawl.
+
+While the model decides what to fetch next, links found in the documents
+fetched so far are requested in the background, so a tool call for one of
+them can be answered without waiting for the network. Only plain GET requests
+are prefetched, within a per-crawl budget.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from anp_examples.anp_tool import ANPTool
+from anp_examples.utils.links import extract_links
+
+# Documents prefetched per crawl, can be overridden with ANP_PREFETCH_BUDGET
+DEFAULT_PREFETCH_BUDGET = 10
+
+# Prefetches in flight at the same time
+DEFAULT_PREFETCH_CONCURRENCY = 4
+
+# Links that point at media rather than documents the model can navigate
+SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".mp3", ".mp4", ".css", ".js",
+)
+
+# Links to description and interface documents are prefetched first
+PREFERRED_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+def _link_priority(link: str):
+    path = urlparse(link).path.lower()
+    return (0 if path.endswith(PREFERRED_EXTENSIONS) else 1, link)
+
+
+class Prefetcher:
+    """Per-crawl cache of documents fetched ahead of the model's tool calls"""
+
+    def __init__(
+        self,
+        anp_tool: ANPTool,
+        budget: int = DEFAULT_PREFETCH_BUDGET,
+        concurrency: int = DEFAULT_PREFETCH_CONCURRENCY,
+    ):
+        """
+        Args:
+            anp_tool (ANPTool): Tool the documents are fetched with
+            budget (int, optional): Documents prefetched at most, default is 10. 0 disables prefetching.
+            concurrency (int, optional): Prefetches in flight at the same time, default is 4
+        """
+        self.anp_tool = anp_tool
+        self.budget = budget
+        self._limit = asyncio.Semaphore(max(concurrency, 1))
+        # URL -> task fetching it
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # URLs already requested by the crawl itself
+        self._seen = set()
+        self.stats = {"scheduled": 0, "hit": 0, "miss": 0}
+
+    def mark_fetched(self, url: str) -> None:
+        """Remember a URL the crawl fetched itself so it is not prefetched"""
+        self._seen.add(url)
+
+    def schedule(self, document: Any) -> None:
+        """Start prefetching the links of a document, within the remaining budget"""
+        if self.budget <= 0 or not isinstance(document, dict) or "error" in document:
+            return
+
+        candidates = [
+            link
+            for link in extract_links(document)
+            if link not in self._seen
+            and link not in self._tasks
+            and urlparse(link).scheme in ("http", "https")
+            and not urlparse(link).path.lower().endswith(SKIPPED_EXTENSIONS)
+        ]
+        for link in sorted(candidates, key=_link_priority):
+            if self.stats["scheduled"] >= self.budget:
+                break
+            self.stats["scheduled"] += 1
+            self._tasks[link] = asyncio.ensure_future(self._prefetch(link))
+            logging.debug(f"Prefetching {link}")
+
+    async def _prefetch(self, url: str) -> Dict[str, Any]:
+        async with self._limit:
+            return await self.anp_tool.execute(url=url)
+
+    async def take(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        body: Any = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the prefetched result of a request, waiting for it if still in flight
+
+        Only plain GET requests without headers, params or body can be answered. A
+        prefetch still in flight after timeout seconds is left running and None is returned.
+
+        Returns:
+            Optional[Dict[str, Any]]: The result, or None if the request must be sent normally
+        """
+        self.mark_fetched(url)
+        if method.upper() != "GET" or headers or params or body is not None:
+            return None
+        task = self._tasks.pop(url, None)
+        if task is None or task.cancelled():
+            self.stats["miss"] += 1
+            return None
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            # Keep the task so close() cancels it
+            self._tasks[url] = task
+            self.stats["miss"] += 1
+            return None
+        except Exception as e:
+            logging.warning(f"Prefetch of {url} failed, fetching again: {str(e)}")
+            self.stats["miss"] += 1
+            return None
+        if "error" in result:
+            # Fetch failures are retried by the real request
+            self.stats["miss"] += 1
+            return None
+
+        self.stats["hit"] += 1
+        logging.info(f"Using prefetched document: {url}")
+        result["prefetched"] = True
+        return result
+
+    async def close(self) -> None:
+        """Cancel prefetches that were not used"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logging.info(
+            f"Prefetch stats: {self.stats['scheduled']} scheduled, {self.stats['hit']} used, "
+            f"{self.stats['miss']} missed"
+        )
@@ -0,0 +1,159 @@
+"""
+Retry, hedging and circuit breaking primitives used by ANPTool.
+"""
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict, Optional
+
+# Methods that can be sent again without changing the outcome on the server
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient failures"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        retry_statuses=(429, 502, 503, 504),
+    ):
+        """
+        Args:
+            max_attempts (int, optional): Total attempts including the first one, default is 3
+            base_delay (float, optional): Backoff ceiling of the first retry in seconds, default is 0.2
+            max_delay (float, optional): Upper bound of any single backoff in seconds, default is 5
+            retry_statuses (tuple, optional): Response status codes treated as transient
+        """
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = tuple(retry_statuses)
+
+    def attempts_for(self, method: str) -> int:
+        """Number of attempts allowed for a method; non-idempotent methods are never retried"""
+        return self.max_attempts if method.upper() in IDEMPOTENT_METHODS else 1
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Backoff before the next attempt ("full jitter")
+
+        Args:
+            attempt (int): Zero-based index of the attempt that just failed
+            retry_after (str, optional): Retry-After header of the failed response, in seconds
+
+        Returns:
+            float: Seconds to wait
+        """
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), self.max_delay)
+            except ValueError:
+                pass
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker
+
+    After failure_threshold consecutive failures the circuit opens and requests
+    fail fast. Once reset_timeout has passed a single trial request is let
+    through (half-open); its outcome closes or re-opens the circuit. A trial
+    that never reports an outcome, e.g. because it was cancelled, is given up
+    after another reset_timeout so the circuit cannot stay half-open forever.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at = 0.0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if (self.state == self.OPEN and now - self.opened_at >= self.reset_timeout) or (
+            self.state == self.HALF_OPEN and now - self.trial_started_at >= self.reset_timeout
+        ):
+            self.state = self.HALF_OPEN
+            self.trial_started_at = now
+            return True
+        # Open, or half-open with the trial request still in flight
+        return False
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a trial request through"""
+        if self.state == self.CLOSED:
+            return 0.0
+        since = self.opened_at if self.state == self.OPEN else self.trial_started_at
+        return max(self.reset_timeout - (time.monotonic() - since), 0.0)
+
+    def release_trial(self) -> None:
+        """Give up a trial request that finished without an outcome, e.g. when it was cancelled"""
+        if self.state == self.HALF_OPEN:
+            # opened_at is unchanged, so the next request becomes the new trial
+            self.state = self.OPEN
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logging.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Sliding window of request latencies for one host"""
+
+    def __init__(self, window: int = 100, min_samples: int = 10):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency at the given fraction (e.g. 0.95), or None until enough samples exist"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(len(ordered) * fraction), len(ordered) - 1)
+        return ordered[index]
+
+
+class HostRegistry:
+    """Lazily created per-host circuit breakers and latency trackers"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    def latency(self, host: str) -> LatencyTracker:
+        if host not in self.latencies:
+            self.latencies[host] = LatencyTracker()
+        return self.latencies[host]
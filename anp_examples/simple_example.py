@@ -1,16 +1,34 @@
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Callable, Awaitable, Tuple, AsyncIterator
 import os
-import json
 import logging
 import asyncio
+import time
 from pathlib import Path
-from openai import AsyncAzureOpenAI
+from openai import APITimeoutError, AsyncAzureOpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
 from dotenv import load_dotenv
 from anp_examples.utils.log_base import set_log_color_level
 from anp_examples.anp_tool import ANPTool  # Import ANPTool
-from openai import AsyncOpenAI,OpenAI
-from config import validate_config, DASHSCOPE_API_KEY, DASHSCOPE_BASE_URL, DASHSCOPE_MODEL_NAME, OPENAI_API_KEY, \
-    OPENAI_BASE_URL, OPENAI_MODEL
+from anp_examples.answer_cache import AnswerCache, get_answer_cache
+from anp_examples.crawl_events import (
+    CrawlEvent,
+    DocumentEvent,
+    FinalAnswerEvent,
+    ModelMessageEvent,
+    TokenEvent,
+    ToolCallEvent,
+)
+from anp_examples.crawl_metrics import CrawlMetrics, fetch_metrics, usage_counts
+from anp_examples.context_budget import ContextBudget, DEFAULT_CONTEXT_TOKEN_BUDGET
+from anp_examples.deadline import CrawlDeadline, DEFAULT_CRAWL_TIMEOUT, DEFAULT_SUMMARY_RESERVE
+from anp_examples.llm_clients import get_llm_client, resolve_model_name
+from anp_examples.metrics import elapsed_ms
+from anp_examples.prefetch import DEFAULT_PREFETCH_BUDGET, Prefetcher
+from anp_examples.utils import json_codec
+from anp_examples.utils.env import env_flag
+from anp_examples.utils.jsonld import minimize_tool_result
+from config import validate_config
 
 # Get the absolute path to the root directory
 ROOT_DIR = Path(__file__).resolve().parent.parent
@@ -20,18 +38,16 @@ load_dotenv(ROOT_DIR / ".env")
 
 from datetime import datetime
 
-current_date = datetime.now().strftime("%Y-%m-%d")
-
 validate_config()
 
-SEARCH_AGENT_PROMPT_TEMPLATE = f"""
+# Static system prompt. It is sent byte-identical with every request, together with the
+# tool schema, so providers can serve it from their prompt prefix cache. Anything that
+# differs per request belongs in TASK_CONTEXT_TEMPLATE, which is sent after it.
+SEARCH_AGENT_PROMPT = """
 You are a general-purpose intelligent network data exploration tool. Your goal is to find the information and APIs that users need by recursively accessing various data formats (including JSON-LD, YAML, etc.) to complete specific tasks.
 
-## Current Task
-{{task_description}}
-
 ## Important Notes
-1. You will receive an initial URL ({{initial_url}}), which is an agent description file.
+1. You will receive an initial URL, which is an agent description file.
 2. You need to understand the structure, functionality, and API usage methods of this agent.
 3. You need to continuously discover and access new URLs and API endpoints like a web crawler.
 4. You can use anp_tool to get the content of any URL.
@@ -66,14 +82,43 @@ You are a general-purpose intelligent network data exploration tool. Your goal i
 4. Look for fields such as serviceEndpoint, url, etc., which usually point to APIs or more data.
 
 Provide detailed information and clear explanations to help users understand the information you found and your recommendations.
+"""
+
+TASK_CONTEXT_TEMPLATE = """## Current Task
+{task_description}
+
+## Initial URL
+{initial_url}
 
 ## Date
 Current date: {current_date}
 """
 
+# Sent when a crawl is stopped early, before the final summarization turn
+PARTIAL_SUMMARY_PROMPTS = {
+    "deadline": "The time available for this task is almost used up. Do not request any more documents. Answer the user's task now, based only on the information obtained so far, and say which parts could not be completed.",
+    "token_budget": "The token budget for this task has been used up. Do not request any more documents. Answer the user's task now, based only on the information obtained so far, and say which parts could not be completed.",
+}
+
+# Answer of a stopped crawl whose final summarization turn failed as well
+PARTIAL_FALLBACK_ANSWER = "The crawl was stopped before an answer could be produced ({reason}). {documents} documents were crawled; please try again or narrow down the question."
+
 # Global variable
 initial_url = "https://agent-search.ai/ad.json"
 
+# Receives progress events of simple_crawl: (event name, event data)
+EventCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# Receives the typed events of a crawl as they happen
+EventEmitter = Callable[[CrawlEvent], Awaitable[None]]
+
+# Events buffered by simple_crawl_iter before the crawl waits for the consumer
+EVENT_QUEUE_SIZE = 100
+
+# Default number of tool calls from one model response executed at the same time,
+# can be overridden with ANP_TOOL_CALL_CONCURRENCY
+DEFAULT_TOOL_CALL_CONCURRENCY = 5
+
 
 # Define available tools
 def get_available_tools(anp_tool_instance):
@@ -96,10 +141,15 @@ async def handle_tool_call(
     anp_tool: ANPTool,
     crawled_documents: List[Dict],
     visited_urls: set,
+    emit: Optional[EventEmitter] = None,
+    minimize: bool = True,
+    prefetcher: Optional[Prefetcher] = None,
+    tool_metrics: Optional[List[Dict]] = None,
+    timeout: Optional[float] = None,
 ) -> None:
     """Handle tool call"""
     function_name = tool_call.function.name
-    function_args = json.loads(tool_call.function.arguments)
+    function_args = json_codec.loads(tool_call.function.arguments)
 
     if function_name == "anp_tool":
         url = function_args.get("url")
@@ -108,22 +158,43 @@ async def handle_tool_call(
         params = function_args.get("params", {})
         body = function_args.get("body")
 
+        if emit is not None:
+            await emit(ToolCallEvent(id=tool_call.id, url=url, method=method, params=params))
+
         try:
-            # Use ANPTool to get URL content
-            result = await anp_tool.execute(
-                url=url, method=method, headers=headers, params=params, body=body
-            )
+            # Use a prefetched document if there is one, otherwise ANPTool to get URL content
+            fetch_started = time.perf_counter()
+            result = None
+            if prefetcher is not None:
+                result = await prefetcher.take(
+                    url, method=method, headers=headers, params=params, body=body, timeout=timeout
+                )
+            if result is None:
+                if timeout is not None:
+                    timeout = max(timeout - (time.perf_counter() - fetch_started), 0.0)
+                result = await anp_tool.execute(
+                    url=url, method=method, headers=headers, params=params, body=body, timeout=timeout
+                )
             logging.info(f"ANPTool response [url: {url}]")
+            if tool_metrics is not None:
+                tool_metrics.append(fetch_metrics(url, method, result, elapsed_ms(fetch_started)))
+            if prefetcher is not None:
+                prefetcher.schedule(result)
 
             # Record visited URLs and obtained content
             visited_urls.add(url)
             crawled_documents.append({"url": url, "method": method, "content": result})
+            if emit is not None:
+                await emit(DocumentEvent(url=url, method=method, content=result))
 
+            # The model sees a minimized copy, crawled_documents keep the full content
             messages.append(
                 {
                     "role": "tool",
                     "tool_call_id": tool_call.id,
-                    "content": json.dumps(result, ensure_ascii=False),
+                    "content": json_codec.dumps(
+                        minimize_tool_result(result) if minimize else result
+                    ),
                 }
             )
         except Exception as e:
@@ -133,7 +204,7 @@ async def handle_tool_call(
                 {
                     "role": "tool",
                     "tool_call_id": tool_call.id,
-                    "content": json.dumps(
+                    "content": json_codec.dumps(
                         {
                             "error": f"Failed to use ANPTool for URL: {url}",
                             "message": str(e),
@@ -143,16 +214,233 @@ async def handle_tool_call(
             )
 
 
-async def simple_crawl(
+async def handle_tool_calls(
+    tool_calls: List[Any],
+    messages: List[Dict],
+    anp_tool: ANPTool,
+    crawled_documents: List[Dict],
+    visited_urls: set,
+    max_calls: int,
+    concurrency: int = DEFAULT_TOOL_CALL_CONCURRENCY,
+    emit: Optional[EventEmitter] = None,
+    minimize: bool = True,
+    prefetcher: Optional[Prefetcher] = None,
+    tool_metrics: Optional[List[Dict]] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    """
+    Handle the tool calls of one model response concurrently
+
+    Tool messages are appended in the order of tool_calls, as the chat API requires.
+    Calls beyond max_calls are not executed but still answered with a skipped message,
+    since every tool_call_id needs a response.
+
+    Args:
+        tool_calls: Tool calls of the assistant message
+        messages: Conversation the tool messages are appended to
+        anp_tool: ANPTool used to fetch URLs
+        crawled_documents: Crawled documents, extended in tool call order
+        visited_urls: Visited URLs
+        max_calls: Number of tool calls that may still be executed
+        concurrency: Tool calls executed at the same time
+        emit: Receives a ToolCallEvent per executed call and a DocumentEvent per fetched URL
+        minimize: Whether tool results are minimized before they are shown to the model
+        prefetcher: Prefetcher answering calls for prefetched documents and prefetching
+            the links of new ones
+        tool_metrics: Receives the fetch metrics of every executed call, in tool call order
+        timeout: Seconds the calls may take together. Calls still running then are answered
+            with a deadline_exceeded error.
+    """
+    to_execute = tool_calls[: max(max_calls, 0)]
+    call_messages = [[] for _ in to_execute]
+    call_documents = [[] for _ in to_execute]
+    call_metrics = [[] for _ in to_execute]
+    limit = asyncio.Semaphore(max(concurrency, 1))
+    expires_at = time.monotonic() + timeout if timeout is not None else None
+
+    async def run(index: int, tool_call: Any) -> None:
+        async with limit:
+            await handle_tool_call(
+                tool_call,
+                call_messages[index],
+                anp_tool,
+                call_documents[index],
+                visited_urls,
+                emit,
+                minimize,
+                prefetcher,
+                call_metrics[index],
+                None if timeout is None else max(expires_at - time.monotonic(), 0.0),
+            )
+
+    if len(to_execute) > 1:
+        logging.info(f"Executing {len(to_execute)} tool calls concurrently")
+    await asyncio.gather(*(run(i, call) for i, call in enumerate(to_execute)))
+
+    for index in range(len(to_execute)):
+        messages.extend(call_messages[index])
+        crawled_documents.extend(call_documents[index])
+        if tool_metrics is not None:
+            tool_metrics.extend(call_metrics[index])
+
+    for tool_call in tool_calls[len(to_execute) :]:
+        logging.info(f"Skipping tool call {tool_call.id}, document limit reached")
+        messages.append(
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": json_codec.dumps(
+                    {
+                        "error": "Skipped: the maximum number of documents to crawl has been reached",
+                        "skipped": True,
+                    }
+                ),
+            }
+        )
+
+
+async def create_chat_completion(
+    client: Any,
+    model_name: str,
+    messages: List[Dict],
+    tools: List[Dict],
+    emit: Optional[EventEmitter] = None,
+    tool_choice: str = "auto",
+    timeout: Optional[float] = None,
+) -> Tuple[ChatCompletionMessage, Optional[CompletionUsage]]:
+    """
+    Request the next assistant message
+
+    Without emit the completion is requested in one piece. With emit it is
+    streamed, every content delta is sent as a TokenEvent, and the streamed tool
+    call fragments are reassembled into complete tool calls.
+
+    Args:
+        tool_choice: "auto", or "none" to force an answer without tool calls
+        timeout: Seconds the whole call may take, streaming included
+
+    Returns:
+        Tuple[ChatCompletionMessage, Optional[CompletionUsage]]: (the assistant message,
+            token usage reported by the provider)
+
+    Raises:
+        asyncio.TimeoutError: If the call did not finish within timeout
+    """
+    request = {
+        "model": model_name,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": tool_choice,
+    }
+    if timeout is None:
+        return await _create_chat_completion(client, request, emit)
+    request["timeout"] = timeout
+    return await asyncio.wait_for(_create_chat_completion(client, request, emit), timeout)
+
+
+async def _create_chat_completion(
+    client: Any, request: Dict[str, Any], emit: Optional[EventEmitter]
+) -> Tuple[ChatCompletionMessage, Optional[CompletionUsage]]:
+    if emit is None:
+        completion = await client.chat.completions.create(**request)
+        return completion.choices[0].message, completion.usage
+
+    stream = await client.chat.completions.create(
+        **request,
+        stream = True,
+        stream_options = {"include_usage": True},
+    )
+
+    usage = None
+    content_parts = []
+    # index -> {"id", "name", "arguments"} of tool calls being streamed
+    tool_call_parts: Dict[int, Dict[str, Any]] = {}
+    async for chunk in stream:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            # The final chunk only carries usage
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content_parts.append(delta.content)
+            await emit(TokenEvent(content=delta.content))
+        for fragment in delta.tool_calls or []:
+            part = tool_call_parts.setdefault(
+                fragment.index, {"id": None, "name": "", "arguments": []}
+            )
+            if fragment.id:
+                part["id"] = fragment.id
+            if fragment.function is not None:
+                if fragment.function.name:
+                    part["name"] += fragment.function.name
+                if fragment.function.arguments:
+                    part["arguments"].append(fragment.function.arguments)
+
+    tool_calls = [
+        ChatCompletionMessageToolCall(
+            id=part["id"],
+            type="function",
+            function={"name": part["name"], "arguments": "".join(part["arguments"])},
+        )
+        for _, part in sorted(tool_call_parts.items())
+    ]
+    message = ChatCompletionMessage(
+        role="assistant",
+        content="".join(content_parts) or None,
+        tool_calls=tool_calls or None,
+    )
+    return message, usage
+
+
+def add_usage(totals: Dict[str, int], usage: Optional[CompletionUsage]) -> None:
+    """
+    Add the usage of one model call to running totals
+
+    cached_tokens counts the prompt tokens the provider served from its prefix cache.
+    """
+    totals["llm_calls"] += 1
+    if usage is None:
+        return
+    counts = usage_counts(usage)
+    for field, value in counts.items():
+        totals[field] += value
+    logging.info(
+        f"Model usage: {counts['prompt_tokens']} prompt tokens ({counts['cached_tokens']} cached), "
+        f"{counts['completion_tokens']} completion tokens"
+    )
+
+
+async def simple_crawl_iter(
     user_input: str,
     task_type: str = "general",
     did_document_path: Optional[str] = None,
     private_key_path: Optional[str] = None,
     max_documents: int = 10,
     initial_url: str = "https://agent-search.ai/ad.json",
-) -> Dict[str, Any]:
+    anp_tool: Optional[ANPTool] = None,
+    tool_call_concurrency: Optional[int] = None,
+    llm_client: Optional[Any] = None,
+    model_name: Optional[str] = None,
+    context_token_budget: Optional[int] = None,
+    minimize_documents: Optional[bool] = None,
+    bypass_cache: bool = False,
+    answer_cache: Optional[AnswerCache] = None,
+    prefetch_budget: Optional[int] = None,
+    collect_metrics: bool = True,
+    timeout: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    stream_tokens: bool = True,
+    keep_documents: bool = True,
+) -> AsyncIterator[CrawlEvent]:
     """
-    Simplified crawling logic: let the model decide the crawling path autonomously
+    Simplified crawling logic: let the model decide the crawling path autonomously,
+    yielding events as they happen
+
+    Yields ToolCallEvent, DocumentEvent, TokenEvent and ModelMessageEvent while crawling
+    and a FinalAnswerEvent with the crawl result last. The crawl runs ahead of the
+    consumer by at most EVENT_QUEUE_SIZE events. Close the generator with aclose()
+    when stopping early, which cancels the crawl.
 
     Args:
         user_input: Task description input by the user
@@ -161,65 +449,249 @@ async def simple_crawl(
         private_key_path: Private key path
         max_documents: Maximum number of documents to crawl
         initial_url: Initial URL to start crawling from
+        anp_tool: Shared ANPTool whose pooled session is reused. If None, a
+            temporary ANPTool is created and closed when the crawl finishes.
+        tool_call_concurrency: Tool calls from one model response executed at the same
+            time. If None, uses ANP_TOOL_CALL_CONCURRENCY or 5.
+        llm_client: AsyncOpenAI compatible client. If None, the shared client of
+            MODEL_PROVIDER from the LLM client registry is used.
+        model_name: Model to request. If None, uses the model configured for MODEL_PROVIDER.
+        context_token_budget: Estimated tokens the message history may use before older
+            tool results are replaced by digests. If None, uses ANP_CONTEXT_TOKEN_BUDGET
+            or 60000. 0 disables compaction.
+        minimize_documents: Whether JSON-LD documents are minimized (no @context, empty
+            fields or long arrays) before they are shown to the model. If None, uses
+            ANP_MINIMIZE_DOCUMENTS or True. crawled_documents always keep the full content.
+        bypass_cache: Whether to crawl even if a cached answer exists. The new answer is
+            still stored.
+        answer_cache: Cache of complete answers. If None, uses the process-wide cache,
+            which is enabled by setting ANP_ANSWER_CACHE_TTL.
+        prefetch_budget: Linked documents fetched in the background while the model is
+            thinking, so the tool calls requesting them return right away. If None, uses
+            ANP_PREFETCH_BUDGET or 10. 0 disables prefetching.
+        collect_metrics: Whether the result gets a "metrics" section with the model latency
+            and token usage of every iteration, the latency and size of every fetch, and totals
+        timeout: Wall-clock seconds the crawl may take. Model and tool calls are bounded by
+            the time left, and when it runs low the model is asked for a final answer from
+            the documents obtained so far. If None, uses ANP_CRAWL_TIMEOUT or 540. 0
+            disables the deadline.
+        token_budget: Prompt and completion tokens the model calls may use before the model
+            is asked for a final answer. If None, uses ANP_CRAWL_TOKEN_BUDGET or 0 (no budget).
+        stream_tokens: Whether model responses are streamed as TokenEvents
+        keep_documents: Whether the result's crawled_documents keep the document content.
+            If False, they only keep the status, and the content is only available from
+            the DocumentEvents, so consumers can drop it once handled.
+
+    Yields:
+        CrawlEvent: Progress events, then a FinalAnswerEvent whose result has "cached" set
+            to True when the answer came from the answer cache and "partial" set to True,
+            with a "partial_reason" of "deadline" or "token_budget", when the crawl was
+            stopped early
+    """
+    if llm_client is None:
+        llm_client, default_model_name = get_llm_client()
+        model_name = model_name or default_model_name
+    elif model_name is None:
+        model_name = resolve_model_name()
+
+    # Answer repeated questions from the answer cache
+    if answer_cache is None:
+        answer_cache = get_answer_cache()
+    cache_key = answer_cache.make_key(
+        user_input, initial_url, task_type, model_name, keep_documents
+    )
+    if answer_cache.enabled:
+        if bypass_cache:
+            answer_cache.stats["bypass"] += 1
+        else:
+            cached = answer_cache.get(cache_key)
+            if cached is not None:
+                logging.info(f"Answer cache hit for query: {user_input}")
+                yield FinalAnswerEvent(result=cached)
+                return
+
+    # Initialize ANPTool unless a shared one was provided
+    owns_anp_tool = anp_tool is None
+    if owns_anp_tool:
+        anp_tool = ANPTool(
+            did_document_path=did_document_path, private_key_path=private_key_path
+        )
+
+    if context_token_budget is None:
+        context_token_budget = int(
+            os.environ.get("ANP_CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)
+        )
+
+    if minimize_documents is None:
+        minimize_documents = env_flag("ANP_MINIMIZE_DOCUMENTS", True)
+
+    if tool_call_concurrency is None:
+        tool_call_concurrency = int(
+            os.environ.get("ANP_TOOL_CALL_CONCURRENCY", DEFAULT_TOOL_CALL_CONCURRENCY)
+        )
+
+    if timeout is None:
+        timeout = float(os.environ.get("ANP_CRAWL_TIMEOUT", DEFAULT_CRAWL_TIMEOUT))
+    if token_budget is None:
+        token_budget = int(os.environ.get("ANP_CRAWL_TOKEN_BUDGET", 0))
+    deadline = CrawlDeadline(
+        timeout,
+        token_budget,
+        float(os.environ.get("ANP_SUMMARY_RESERVE", DEFAULT_SUMMARY_RESERVE)),
+    )
+
+    if prefetch_budget is None:
+        prefetch_budget = int(os.environ.get("ANP_PREFETCH_BUDGET", DEFAULT_PREFETCH_BUDGET))
+    prefetcher = Prefetcher(anp_tool, budget=prefetch_budget)
+
+    events: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    async def crawl() -> Dict[str, Any]:
+        try:
+            return await _simple_crawl(
+                user_input,
+                task_type,
+                max_documents,
+                initial_url,
+                anp_tool,
+                tool_call_concurrency,
+                llm_client,
+                model_name,
+                events.put,
+                stream_tokens,
+                keep_documents,
+                ContextBudget(context_token_budget),
+                minimize_documents,
+                prefetcher,
+                CrawlMetrics() if collect_metrics else None,
+                deadline,
+            )
+        finally:
+            # Prefetches the model did not ask for are cancelled with the crawl
+            await prefetcher.close()
+            if owns_anp_tool:
+                await anp_tool.close()
+
+    task = asyncio.ensure_future(crawl())
+    try:
+        while not task.done() or not events.empty():
+            get = asyncio.ensure_future(events.get())
+            await asyncio.wait({get, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not get.done():
+                get.cancel()
+                continue
+            yield get.result()
+        # Raises the crawl's exception, if it failed
+        result = task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    answer_cache.put(cache_key, result)
+    result["cached"] = False
+    yield FinalAnswerEvent(result=result)
+
+
+async def simple_crawl(
+    user_input: str,
+    task_type: str = "general",
+    did_document_path: Optional[str] = None,
+    private_key_path: Optional[str] = None,
+    max_documents: int = 10,
+    initial_url: str = "https://agent-search.ai/ad.json",
+    anp_tool: Optional[ANPTool] = None,
+    tool_call_concurrency: Optional[int] = None,
+    llm_client: Optional[Any] = None,
+    model_name: Optional[str] = None,
+    on_event: Optional[EventCallback] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Simplified crawling logic: let the model decide the crawling path autonomously
+
+    Collects the events of simple_crawl_iter and returns the final result. Takes the
+    same keyword options as simple_crawl_iter.
+
+    Args:
+        on_event: Async callback receiving progress events as (name, data): "document" for
+            every fetched URL, "tool_call" for every executed tool call, "model_message"
+            for every model response and "token" for every content fragment streamed from
+            the model. If set, model responses are streamed.
 
     Returns:
-        Dictionary containing the crawl results
+        Dictionary containing the crawl results, see simple_crawl_iter
     """
+    options.setdefault("stream_tokens", on_event is not None)
+    events = simple_crawl_iter(
+        user_input,
+        task_type,
+        did_document_path,
+        private_key_path,
+        max_documents,
+        initial_url,
+        anp_tool,
+        tool_call_concurrency,
+        llm_client,
+        model_name,
+        **options,
+    )
+    result = None
+    try:
+        async for event in events:
+            if isinstance(event, FinalAnswerEvent):
+                result = event.result
+            elif on_event is not None:
+                await on_event(event.name, event.data())
+    finally:
+        await events.aclose()
+    return result
+
+
+async def _simple_crawl(
+    user_input: str,
+    task_type: str,
+    max_documents: int,
+    initial_url: str,
+    anp_tool: ANPTool,
+    tool_call_concurrency: int,
+    client: Any,
+    model_name: str,
+    emit: EventEmitter,
+    stream_tokens: bool,
+    keep_documents: bool,
+    context_budget: ContextBudget,
+    minimize_documents: bool,
+    prefetcher: Prefetcher,
+    crawl_metrics: Optional[CrawlMetrics],
+    deadline: CrawlDeadline,
+) -> Dict[str, Any]:
+    """Crawl loop of simple_crawl, running with an already initialized ANPTool"""
     # Initialize variables
     visited_urls = set()
     crawled_documents = []
 
-    # Initialize ANPTool
-    anp_tool = ANPTool(
-        did_document_path=did_document_path, private_key_path=private_key_path
-    )
-
-    # Initialize Azure OpenAI client
-    # client = AsyncAzureOpenAI(
-    #     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    #     api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    #     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    #     azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-    # )
-
-    # 根据 MODEL_PROVIDER 环境变量选择不同的客户端
-    model_provider = os.getenv("MODEL_PROVIDER", "dashscope").lower()
-
-    if model_provider == "dashscope":
-        client = AsyncOpenAI(
-            api_key=DASHSCOPE_API_KEY,
-            base_url=DASHSCOPE_BASE_URL
-        )
-        model_name = DASHSCOPE_MODEL_NAME
-    elif model_provider == "openai":
-        # 检测是否为Azure OpenAI并相应配置
-        if 'openai.azure.com' in OPENAI_BASE_URL.lower():
-            print("检测到Azure OpenAI配置，使用Azure兼容模式")
-            client = AsyncOpenAI(
-                api_key=OPENAI_API_KEY,
-                base_url=OPENAI_BASE_URL,
-                default_headers={"api-key": OPENAI_API_KEY},  # Azure特有的认证header
-                default_query={"api-version": "2024-02-01"},   # Azure必需的API版本
-            )
-        else:
-            print("检测到标准OpenAI配置")
-            client = AsyncOpenAI(
-                api_key=OPENAI_API_KEY,
-                base_url=OPENAI_BASE_URL
-            )
-        model_name = OPENAI_MODEL
-    else:
-        raise ValueError(f"Unsupported MODEL_PROVIDER: {model_provider}")
-
     # Get initial URL content
     try:
-        initial_content = await anp_tool.execute(url=initial_url)
+        fetch_started = time.perf_counter()
+        initial_content = await anp_tool.execute(
+            url=initial_url, timeout=deadline.remaining_for_crawling()
+        )
+        if crawl_metrics is not None:
+            crawl_metrics.initial_fetch = fetch_metrics(
+                initial_url, "GET", initial_content, elapsed_ms(fetch_started)
+            )
         visited_urls.add(initial_url)
+        prefetcher.mark_fetched(initial_url)
+        prefetcher.schedule(initial_content)
         crawled_documents.append(
             {"url": initial_url, "method": "GET", "content": initial_content}
         )
 
         logging.info(f"Successfully obtained initial URL: {initial_url}")
+        await emit(DocumentEvent(url=initial_url, method="GET", content=initial_content))
+        if not keep_documents:
+            _drop_content(crawled_documents[-1])
     except Exception as e:
         logging.error(f"Failed to obtain initial URL {initial_url}: {str(e)}")
         return {
@@ -230,26 +702,47 @@ async def simple_crawl(
         }
 
     # Create initial message
-    formatted_prompt = SEARCH_AGENT_PROMPT_TEMPLATE.format(
-        task_description=user_input, initial_url=initial_url
+    initial_description = (
+        minimize_tool_result(initial_content) if minimize_documents else initial_content
+    )
+    task_context = TASK_CONTEXT_TEMPLATE.format(
+        task_description=user_input,
+        initial_url=initial_url,
+        current_date=datetime.now().strftime("%Y-%m-%d"),
     )
 
     messages = [
-        {"role": "system", "content": formatted_prompt},
+        {"role": "system", "content": SEARCH_AGENT_PROMPT},
+        {"role": "system", "content": task_context},
         {"role": "user", "content": user_input},
         {
             "role": "system",
-            "content": f"I have obtained the content of the initial URL. Here is the description data of the search agent:\n\n```json\n{json.dumps(initial_content, ensure_ascii=False, indent=2)}\n```\n\nPlease analyze this data, understand the functions and API usage of the search agent. Find the links you need to visit, and use the anp_tool to get more information to complete the user's task.",
+            "content": f"I have obtained the content of the initial URL. Here is the description data of the search agent:\n\n```json\n{json_codec.dumps(initial_description)}\n```\n\nPlease analyze this data, understand the functions and API usage of the search agent. Find the links you need to visit, and use the anp_tool to get more information to complete the user's task.",
         },
     ]
 
     # Start conversation loop
     current_iteration = 0
+    usage_totals = {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "cached_tokens": 0,
+    }
+    response_message = None
+    # Why the crawl was stopped early, if it was
+    partial_reason = None
 
     while current_iteration < max_documents:
         current_iteration += 1
         logging.info(f"Starting crawl iteration {current_iteration}/{max_documents}")
 
+        # Stop crawling when the deadline approaches or the token budget is used up
+        partial_reason = deadline.stop_reason(usage_totals["total_tokens"])
+        if partial_reason is not None:
+            break
+
         # Check if the maximum number of documents to crawl has been reached
         if len(crawled_documents) >= max_documents:
             logging.info(
@@ -263,15 +756,29 @@ async def simple_crawl(
                 }
             )
 
-        # Get model response
-        completion = await client.chat.completions.create(
-            model = model_name,
-            messages = messages,
-            tools = get_available_tools(anp_tool),
-            tool_choice = "auto",
-        )
+        # Keep the history within the token budget by compacting old tool results
+        context_budget.compact(messages)
 
-        response_message = completion.choices[0].message
+        # Get model response
+        llm_started = time.perf_counter()
+        try:
+            response_message, usage = await create_chat_completion(
+                client,
+                model_name,
+                messages,
+                get_available_tools(anp_tool),
+                emit if stream_tokens else None,
+                timeout=deadline.remaining_for_crawling(),
+            )
+        except (asyncio.TimeoutError, APITimeoutError):
+            logging.warning("Model call did not finish before the crawl deadline")
+            partial_reason = "deadline"
+            break
+        add_usage(usage_totals, usage)
+        iteration_metrics = None
+        if crawl_metrics is not None:
+            iteration_metrics = crawl_metrics.add_iteration(elapsed_ms(llm_started), usage)
+        await emit(_model_message_event(usage_totals["llm_calls"], response_message, usage))
         messages.append(
             {
                 "role": "assistant",
@@ -289,15 +796,28 @@ async def simple_crawl(
             logging.info("The model did not request any tool calls, ending crawl")
             break
 
-        # Handle tool calls
-        for tool_call in response_message.tool_calls:
-            await handle_tool_call(
-                tool_call, messages, anp_tool, crawled_documents, visited_urls
-            )
-
-            # If the maximum number of documents to crawl is reached, stop handling tool calls
-            if len(crawled_documents) >= max_documents:
-                break
+        # Handle tool calls concurrently within the remaining document budget
+        tools_started = time.perf_counter()
+        documents_before = len(crawled_documents)
+        await handle_tool_calls(
+            response_message.tool_calls,
+            messages,
+            anp_tool,
+            crawled_documents,
+            visited_urls,
+            max_calls=max_documents - len(crawled_documents),
+            concurrency=tool_call_concurrency,
+            emit=emit,
+            minimize=minimize_documents,
+            prefetcher=prefetcher,
+            tool_metrics=iteration_metrics["tool_calls"] if iteration_metrics else None,
+            timeout=deadline.remaining_for_crawling(),
+        )
+        if iteration_metrics is not None:
+            iteration_metrics["tool_ms"] = elapsed_ms(tools_started)
+        if not keep_documents:
+            for document in crawled_documents[documents_before:]:
+                _drop_content(document)
 
         # If the maximum number of documents to crawl is reached, make a final summary
         if (
@@ -309,18 +829,128 @@ async def simple_crawl(
             )
             continue
 
+    content = response_message.content if response_message is not None else None
+    if partial_reason is not None:
+        content = await _summarize_partial(
+            client,
+            model_name,
+            messages,
+            get_available_tools(anp_tool),
+            emit,
+            stream_tokens,
+            partial_reason,
+            deadline,
+            context_budget,
+            usage_totals,
+            crawl_metrics,
+        )
+        if not content:
+            content = PARTIAL_FALLBACK_ANSWER.format(
+                reason=partial_reason, documents=len(crawled_documents)
+            )
+
     # Create result
     result = {
-        "content": response_message.content,
+        "content": content,
         "type": "text",
         "visited_urls": [doc["url"] for doc in crawled_documents],
         "crawled_documents": crawled_documents,
         "task_type": task_type,
+        "usage": usage_totals,
+        "partial": partial_reason is not None,
     }
+    if partial_reason is not None:
+        result["partial_reason"] = partial_reason
+    if crawl_metrics is not None:
+        result["metrics"] = crawl_metrics.as_dict()
 
     return result
 
 
+async def _summarize_partial(
+    client: Any,
+    model_name: str,
+    messages: List[Dict],
+    tools: List[Dict],
+    emit: EventEmitter,
+    stream_tokens: bool,
+    reason: str,
+    deadline: CrawlDeadline,
+    context_budget: ContextBudget,
+    usage_totals: Dict[str, int],
+    crawl_metrics: Optional[CrawlMetrics],
+) -> Optional[str]:
+    """
+    Ask the model for a final answer from the documents obtained so far
+
+    Tool calls are disabled with tool_choice "none"; the tools are still sent so the
+    request keeps the cached prompt prefix.
+
+    Returns:
+        Optional[str]: The answer, or None if the model did not answer in time
+    """
+    logging.warning(f"Stopping crawl early ({reason}), requesting a final summary")
+    messages.append({"role": "system", "content": PARTIAL_SUMMARY_PROMPTS[reason]})
+    context_budget.compact(messages)
+
+    llm_started = time.perf_counter()
+    try:
+        response_message, usage = await create_chat_completion(
+            client,
+            model_name,
+            messages,
+            tools,
+            emit if stream_tokens else None,
+            tool_choice="none",
+            timeout=deadline.remaining(),
+        )
+    except (asyncio.TimeoutError, APITimeoutError):
+        logging.error("Final summary did not finish before the crawl deadline")
+        return None
+    add_usage(usage_totals, usage)
+    if crawl_metrics is not None:
+        crawl_metrics.add_iteration(elapsed_ms(llm_started), usage)
+    await emit(_model_message_event(usage_totals["llm_calls"], response_message, usage))
+    messages.append({"role": "assistant", "content": response_message.content})
+    return response_message.content
+
+
+def _model_message_event(
+    iteration: int, message: ChatCompletionMessage, usage: Optional[CompletionUsage]
+) -> ModelMessageEvent:
+    """Event describing a finished model response"""
+    tool_calls = []
+    for tool_call in message.tool_calls or []:
+        try:
+            arguments = json_codec.loads(tool_call.function.arguments or "{}")
+        except json_codec.JSONDecodeError:
+            arguments = {}
+        if not isinstance(arguments, dict):
+            arguments = {}
+        tool_calls.append(
+            {
+                "id": tool_call.id,
+                "url": arguments.get("url"),
+                "method": arguments.get("method", "GET"),
+            }
+        )
+    return ModelMessageEvent(
+        iteration=iteration,
+        content=message.content,
+        tool_calls=tool_calls,
+        usage=usage_counts(usage),
+    )
+
+
+def _drop_content(document: Dict[str, Any]) -> None:
+    """Replace a crawled document's content with its status, once it has been emitted"""
+    content = document["content"]
+    summary = {"status_code": content.get("status_code") if isinstance(content, dict) else None}
+    if isinstance(content, dict) and "error" in content:
+        summary["error"] = content["error"]
+    document["content"] = summary
+
+
 async def main():
     """Main function"""
 
@@ -0,0 +1,75 @@
+"""
+Coalescing of identical concurrent async calls.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Run at most one in-flight call per key and share its outcome with every caller
+    that asks for the same key while it is running.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Any, asyncio.Future] = {}
+        # Callers still waiting on each call
+        self._waiters: Dict[asyncio.Future, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Execute fn for key, or join the call already in flight for key
+
+        The call runs in its own task, so a cancelled caller does not cancel the
+        request that other callers are waiting on. Once every caller waiting on it
+        has been cancelled, the call is cancelled too.
+
+        Args:
+            key: Hashable identity of the call
+            fn: Zero-argument coroutine function performing the call
+
+        Returns:
+            Tuple[Any, bool]: (result, whether the result was shared from another caller's call)
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logging.debug(f"Joining in-flight call: {key}")
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                logging.debug(f"Cancelling in-flight call without waiters: {key}")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if self._waiters[task] == 0:
+                del self._waiters[task]
+
+    async def cancel_all(self) -> None:
+        """Cancel every call in flight and wait for them to finish"""
+        tasks = list(self._calls.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _forget(self, key: Any, task: asyncio.Future) -> None:
+        """Drop a finished call so later callers start a new one"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
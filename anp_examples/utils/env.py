@@ -0,0 +1,24 @@
+"""
+Typed access to settings read from environment variables.
+"""
+import os
+
+# Values of a boolean environment variable that mean "enabled"
+TRUE_VALUES = ("1", "true", "yes")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """
+    Read a boolean setting from the environment
+
+    Args:
+        name (str): Environment variable name
+        default (bool): Value used when the variable is not set
+
+    Returns:
+        bool: True if the variable is "1", "true" or "yes" in any case
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
@@ -0,0 +1,69 @@
+"""
+JSON encoding and decoding shared by ANPTool, the crawler and the web backend.
+
+orjson is used when it is installed, otherwise the standard library json module.
+Both paths produce compact UTF-8 output without ASCII escaping.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError, so one type covers both codecs
+JSONDecodeError = json.JSONDecodeError
+
+# Name of the codec in use, reported in logs
+CODEC_NAME = "orjson" if orjson is not None else "json"
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Parse a JSON document directly from bytes or text
+
+    Args:
+        data: UTF-8 encoded bytes or a string
+
+    Returns:
+        Any: Parsed document
+
+    Raises:
+        JSONDecodeError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json (NaN, integers over 64 bits, UTF-16/32 input),
+            # so only report the error if the standard library rejects it too
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    Serialize an object to compact UTF-8 encoded JSON
+
+    Non-string keys (common in YAML documents) are converted to strings and
+    unsupported values such as dates fall back to their string form.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers over 64 bits, which the standard library can encode
+            pass
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize an object to a compact JSON string"""
+    return dumps_bytes(obj).decode("utf-8")
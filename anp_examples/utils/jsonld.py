@@ -0,0 +1,99 @@
+"""
+Compaction of JSON-LD documents before they are shown to the model.
+
+The minimizer strips @context blocks, drops empty fields and collapses long
+arrays to a sample plus a count. Link fields (see links.LINK_FIELDS) are always
+kept, including the links of array items that are left out of the sample, so
+the model can navigate exactly as it could with the full document.
+"""
+import os
+from typing import Any, Dict, List
+
+from anp_examples.utils.links import LINK_FIELDS, extract_links
+
+# Array items kept in the sample, can be overridden with ANP_MINIMIZE_MAX_ARRAY_ITEMS
+DEFAULT_MAX_ARRAY_ITEMS = 5
+
+# Result fields added by ANPTool that describe the transfer, not the document
+TRANSPORT_FIELDS = ("timing", "cache", "coalesced", "prefetched")
+
+# Result formats that are not JSON-LD and are passed through unchanged
+PASSTHROUGH_FORMATS = ("yaml", "text")
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def minimize_document(document: Any, max_array_items: int = DEFAULT_MAX_ARRAY_ITEMS) -> Any:
+    """
+    Return a compact copy of a JSON-LD document
+
+    Args:
+        document: Parsed JSON document
+        max_array_items (int, optional): Items kept of longer arrays, default is 5
+
+    Returns:
+        Any: Minimized copy; the input is not modified
+    """
+    if isinstance(document, dict):
+        minimized = {}
+        for key, value in document.items():
+            if key == "@context":
+                continue
+            if key in LINK_FIELDS and not _is_empty(value):
+                minimized[key] = value
+                continue
+            value = minimize_document(value, max_array_items)
+            if not _is_empty(value):
+                minimized[key] = value
+        return minimized
+
+    if isinstance(document, list):
+        items = [minimize_document(item, max_array_items) for item in document]
+        items = [item for item in items if not _is_empty(item)]
+        if len(items) <= max_array_items:
+            return items
+        return _collapse(items, max_array_items)
+
+    return document
+
+
+def _collapse(items: List[Any], max_array_items: int) -> List[Any]:
+    """Keep a sample of a long array and summarize the rest"""
+    omitted = items[max_array_items:]
+    summary: Dict[str, Any] = {"_omitted_items": len(omitted), "_total_items": len(items)}
+    links = set()
+    for item in omitted:
+        links.update(extract_links(item))
+    if links:
+        summary["_omitted_links"] = sorted(links)
+    return items[:max_array_items] + [summary]
+
+
+def minimize_tool_result(result: Dict[str, Any], max_array_items: int = None) -> Dict[str, Any]:
+    """
+    Minimize an ANPTool result for the model
+
+    Transfer metadata is dropped from every result. YAML and text results are
+    otherwise kept intact, since interface specifications must stay complete.
+
+    Args:
+        result (Dict[str, Any]): Result returned by ANPTool.execute
+        max_array_items (int, optional): Items kept of longer arrays. If None, uses
+            ANP_MINIMIZE_MAX_ARRAY_ITEMS or 5.
+
+    Returns:
+        Dict[str, Any]: Minimized copy of the result
+    """
+    if not isinstance(result, dict):
+        return result
+    if max_array_items is None:
+        max_array_items = int(
+            os.environ.get("ANP_MINIMIZE_MAX_ARRAY_ITEMS", DEFAULT_MAX_ARRAY_ITEMS)
+        )
+
+    stripped = {key: value for key, value in result.items() if key not in TRANSPORT_FIELDS}
+    if stripped.get("format") in PASSTHROUGH_FORMATS:
+        return stripped
+    return minimize_document(stripped, max_array_items)
@@ -0,0 +1,46 @@
+"""
+Link discovery in JSON-LD agent description documents.
+"""
+from typing import Any, Set
+from urllib.parse import urlparse
+
+# Fields whose string values point at further documents or API endpoints
+LINK_FIELDS = ("@id", "url", "serviceEndpoint")
+
+
+def is_valid_url(url):
+    """Validate if URL is valid"""
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except:
+        return False
+
+
+def extract_links(data: Any) -> Set[str]:
+    """Extract links from JSON-LD document"""
+    links = set()
+
+    def traverse(obj):
+        if not obj or not isinstance(obj, dict):
+            return
+
+        # Process links in specific fields
+        for key in LINK_FIELDS:
+            if key in obj and isinstance(obj[key], str) and is_valid_url(obj[key]):
+                links.add(obj[key])
+
+        # Check if other properties are objects or arrays
+        for key, value in obj.items():
+            if key == "@context":
+                continue  # Skip @context
+
+            if isinstance(value, dict):
+                traverse(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, dict):
+                        traverse(item)
+
+    traverse(data)
+    return links
@@ -0,0 +1,121 @@
+"""
+Local agent server serving the ad-json/ fixtures for benchmarks.
+
+Every fixture is served under its own path (/hotel.json, /api/nl-interface.yaml)
+and under the path of the URL it is published at, taken from the "@id" of
+JSON documents and from the URLs the fixtures link to. Links to the fixture
+host are rewritten to this server, so a crawl starting at
+http://<host>:<port>/agents/travel/hotel/ad/ph/12345/ad.json never leaves it.
+
+Usage:
+    python -m benchmarks.agent_server --port 8011
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Directory of the agent description fixtures
+FIXTURES_DIR = ROOT_DIR / "ad-json"
+
+# Host the fixtures are published at, rewritten to the local server
+FIXTURE_ORIGIN = "https://agent-connect.ai"
+
+# Path of the hotel agent description, the default crawl start
+HOTEL_AD_PATH = "/agents/travel/hotel/ad/ph/12345/ad.json"
+
+CONTENT_TYPES = {".json": "application/json", ".yaml": "application/yaml", ".yml": "application/yaml"}
+
+_URL_PATTERN = re.compile(re.escape(FIXTURE_ORIGIN) + r"[^\s\"'<>]*")
+
+
+def build_routes(fixtures_dir: Path = FIXTURES_DIR) -> Dict[str, Path]:
+    """
+    Map URL paths to fixture files
+
+    Returns:
+        Dict[str, Path]: URL path -> fixture file
+    """
+    files = [path for path in fixtures_dir.rglob("*") if path.suffix in CONTENT_TYPES]
+    routes = {"/" + path.relative_to(fixtures_dir).as_posix(): path for path in files}
+
+    # JSON documents are published at their @id
+    for path in files:
+        if path.suffix != ".json":
+            continue
+        try:
+            document_id = json.loads(path.read_text(encoding="utf-8")).get("@id", "")
+        except (ValueError, AttributeError):
+            continue
+        if document_id.startswith(FIXTURE_ORIGIN):
+            routes[urlparse(document_id).path] = path
+
+    # Other links to the fixture host are matched to a fixture by file name
+    by_name = {path.name: path for path in files}
+    for path in files:
+        for url in _URL_PATTERN.findall(path.read_text(encoding="utf-8")):
+            url_path = urlparse(url).path
+            name = url_path.rsplit("/", 1)[-1]
+            if url_path not in routes and name in by_name:
+                routes[url_path] = by_name[name]
+    return routes
+
+
+class AgentServer:
+    """Serves the fixtures with their links pointing back at the server"""
+
+    def __init__(self, latency_ms: float = 0.0, fixtures_dir: Path = FIXTURES_DIR):
+        """
+        Args:
+            latency_ms (float, optional): Delay of every response, default is 0
+            fixtures_dir (Path, optional): Fixture directory, default is ad-json/
+        """
+        self.latency_ms = latency_ms
+        self.routes = build_routes(fixtures_dir)
+        self.stats = {"requests": 0, "not_found": 0}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        path = self.routes.get(request.path)
+        if path is None:
+            self.stats["not_found"] += 1
+            return web.json_response({"error": f"Not found: {request.path}"}, status=404)
+
+        base_url = f"{request.scheme}://{request.host}"
+        text = path.read_text(encoding="utf-8").replace(FIXTURE_ORIGIN, base_url)
+        return web.Response(text=text, content_type=CONTENT_TYPES[path.suffix])
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local agent server serving the ad-json/ fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = AgentServer(latency_ms=args.latency_ms)
+    for url_path, path in sorted(server.routes.items()):
+        logging.info(f"{url_path} -> {path.relative_to(ROOT_DIR)}")
+    print(f"Agent server - start crawls at http://{args.host}:{args.port}{HOTEL_AD_PATH}")
+    web.run_app(server.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,222 @@
+"""
+Deterministic OpenAI-compatible chat completion server for benchmarks.
+
+The server plays back a script instead of calling a model. The step of the
+script is the number of assistant messages in the request, so every crawl
+walks through the same steps whatever else runs concurrently. A step is one
+of:
+
+- a list of URLs: the model calls anp_tool once per URL (GET)
+- a string: the final answer
+- a dictionary with "tool_calls" (list of URLs or anp_tool argument
+  dictionaries) or "content", and optionally "latency_ms",
+  "completion_tokens" and "cached_tokens" overriding the server defaults
+
+"{agent}" in URLs is replaced by the agent server base URL. Point
+OPENAI_BASE_URL at http://<host>:<port>/v1 to use the server.
+
+Usage:
+    python -m benchmarks.fake_llm_server --port 8010 --agent-base-url http://127.0.0.1:8011
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from aiohttp import web
+
+Step = Union[str, List[Any], Dict[str, Any]]
+
+# Answer sent once the script has no more steps
+SCRIPT_FINISHED_ANSWER = "The scripted conversation has finished."
+
+
+def default_script() -> List[Step]:
+    """Script crawling the hotel fixtures of ad-json/ in three model calls"""
+    return [
+        [
+            "{agent}/agents/travel/hotel/api_files/ph/search-interface.yaml",
+            "{agent}/agents/travel/hotel/api_files/ph/booking-interface.yaml",
+        ],
+        ["{agent}/agents/travel/hotel/room/detail/ph/78901/ad.json"],
+        "The Seaview Luxury Hotel in Yalong Bay offers deluxe sea view rooms that can be booked through its booking interface.",
+    ]
+
+
+def load_script(path: str) -> List[Step]:
+    """Load a script from a JSON file containing a list of steps"""
+    with open(path, "r", encoding="utf-8") as f:
+        script = json.load(f)
+    if not isinstance(script, list):
+        raise ValueError(f"Script {path} must be a JSON list of steps")
+    return script
+
+
+def _estimate_prompt_tokens(payload: Dict[str, Any]) -> int:
+    """Rough prompt size, one token per four characters of the request"""
+    return len(json.dumps(payload.get("messages", []), ensure_ascii=False)) // 4 + len(
+        json.dumps(payload.get("tools", []), ensure_ascii=False)
+    ) // 4
+
+
+class FakeLLM:
+    """Plays back a script as chat completions"""
+
+    def __init__(
+        self,
+        script: Optional[List[Step]] = None,
+        agent_base_url: str = "",
+        latency_ms: float = 500.0,
+        completion_tokens: int = 50,
+        prompt_tokens: Optional[int] = None,
+        cached_tokens: int = 0,
+        model_name: str = "fake-model",
+    ):
+        """
+        Args:
+            script (List[Step], optional): Steps to play back, default is default_script()
+            agent_base_url (str, optional): Replaces "{agent}" in the script's URLs
+            latency_ms (float, optional): Delay of every response, default is 500
+            completion_tokens (int, optional): Reported completion tokens, default is 50
+            prompt_tokens (int, optional): Reported prompt tokens. If None, estimated from the request.
+            cached_tokens (int, optional): Reported cached prompt tokens, default is 0
+            model_name (str, optional): Model name reported in responses
+        """
+        self.script = script if script is not None else default_script()
+        self.agent_base_url = agent_base_url.rstrip("/")
+        self.latency_ms = latency_ms
+        self.completion_tokens = completion_tokens
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+        self.model_name = model_name
+        self.stats = {"requests": 0}
+
+    def _step(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Normalized script step answering a conversation"""
+        index = sum(1 for message in messages if message.get("role") == "assistant")
+        step = self.script[index] if index < len(self.script) else SCRIPT_FINISHED_ANSWER
+        if isinstance(step, str):
+            step = {"content": step}
+        elif isinstance(step, list):
+            step = {"tool_calls": step}
+        return {**step, "index": index}
+
+    def _tool_calls(self, step: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tool_calls = []
+        for i, call in enumerate(step.get("tool_calls") or []):
+            arguments = {"url": call} if isinstance(call, str) else dict(call)
+            arguments["url"] = arguments["url"].replace("{agent}", self.agent_base_url)
+            tool_calls.append(
+                {
+                    "id": f"call_{step['index']}_{i}",
+                    "type": "function",
+                    "function": {
+                        "name": "anp_tool",
+                        "arguments": json.dumps(arguments, ensure_ascii=False),
+                    },
+                }
+            )
+        return tool_calls
+
+    def _usage(self, payload: Dict[str, Any], step: Dict[str, Any]) -> Dict[str, Any]:
+        prompt_tokens = self.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = _estimate_prompt_tokens(payload)
+        completion_tokens = step.get("completion_tokens", self.completion_tokens)
+        cached_tokens = min(step.get("cached_tokens", self.cached_tokens), prompt_tokens)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.stats["requests"] += 1
+        step = self._step(payload.get("messages", []))
+        await asyncio.sleep(step.get("latency_ms", self.latency_ms) / 1000)
+
+        tool_calls = self._tool_calls(step)
+        content = step.get("content")
+        usage = self._usage(payload, step)
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        base = {
+            "id": f"chatcmpl-{step['index']}",
+            "created": int(time.time()),
+            "model": payload.get("model") or self.model_name,
+        }
+
+        if not payload.get("stream"):
+            message = {"role": "assistant", "content": content}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return web.json_response(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                    "usage": usage,
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(choices: List[Dict[str, Any]], **extra: Any) -> None:
+            chunk = {**base, "object": "chat.completion.chunk", "choices": choices, **extra}
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+
+        delta: Dict[str, Any] = {"role": "assistant"}
+        if tool_calls:
+            delta["tool_calls"] = [{**call, "index": i} for i, call in enumerate(tool_calls)]
+        await send([{"index": 0, "delta": delta, "finish_reason": None}])
+        for word in (content or "").split(" "):
+            if word:
+                await send([{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}])
+        await send([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await send([], usage=usage)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"object": "list", "data": [{"id": self.model_name, "object": "model"}]}
+        )
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/v1/models", self.models)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--script", help="JSON file with the steps to play back")
+    parser.add_argument("--agent-base-url", default="http://127.0.0.1:8011")
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--prompt-tokens", type=int, default=None)
+    parser.add_argument("--cached-tokens", type=int, default=0)
+    args = parser.parse_args()
+
+    fake_llm = FakeLLM(
+        script=load_script(args.script) if args.script else None,
+        agent_base_url=args.agent_base_url,
+        latency_ms=args.latency_ms,
+        completion_tokens=args.completion_tokens,
+        prompt_tokens=args.prompt_tokens,
+        cached_tokens=args.cached_tokens,
+    )
+    print(f"Fake LLM server - set OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    web.run_app(fake_llm.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
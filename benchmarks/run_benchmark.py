@@ -0,0 +1,230 @@
+"""
+End-to-end benchmark of simple_crawl against local servers.
+
+Starts the fake LLM server and the fixture agent server on free ports, points
+OPENAI_BASE_URL at the fake server and runs crawls of the hotel fixtures,
+N at a time. Reports end-to-end and per-iteration latency, the split between
+time spent waiting for the model and running tool calls, and throughput, all
+taken from the "metrics" section of the simple_crawl results.
+
+Usage:
+    python -m benchmarks.run_benchmark --crawls 20 --concurrency 5 --llm-latency-ms 800
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from benchmarks.agent_server import HOTEL_AD_PATH, AgentServer
+from benchmarks.fake_llm_server import FakeLLM, load_script
+
+# Model name reported by the fake server
+BENCHMARK_MODEL = "fake-model"
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(percentile / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(statistics.fmean(values), 1) if values else 0.0,
+        "p50": round(_percentile(values, 50), 1),
+        "p95": round(_percentile(values, 95), 1),
+        "max": round(max(values), 1) if values else 0.0,
+    }
+
+
+def summarize(
+    results: List[Dict[str, Any]], errors: List[str], wall_s: float
+) -> Dict[str, Any]:
+    """
+    Aggregate the metrics of the crawl results into the benchmark report
+
+    Args:
+        results: Metrics sections of the completed crawls
+        errors: Errors of the failed crawls
+        wall_s: Seconds the measured crawls took together
+    """
+    iterations = [iteration for metrics in results for iteration in metrics["iterations"]]
+    fetches = [
+        fetch
+        for metrics in results
+        for fetch in [metrics["initial_fetch"]]
+        + [call for iteration in metrics["iterations"] for call in iteration["tool_calls"]]
+        if fetch is not None
+    ]
+    totals = [metrics["totals"] for metrics in results]
+    total_ms = sum(total["total_ms"] for total in totals)
+    llm_ms = sum(total["llm_ms"] for total in totals)
+    tool_ms = sum(total["tool_ms"] for total in totals)
+    completed = len(results)
+    return {
+        "crawls": completed + len(errors),
+        "failed": len(errors),
+        "wall_s": round(wall_s, 3),
+        "throughput_crawls_per_s": round(completed / wall_s, 3) if wall_s else 0.0,
+        "end_to_end_ms": _distribution([total["total_ms"] for total in totals]),
+        "iteration_ms": _distribution([it["llm_ms"] + it["tool_ms"] for it in iterations]),
+        "llm_call_ms": _distribution([it["llm_ms"] for it in iterations]),
+        "fetch_ms": _distribution([fetch["fetch_ms"] for fetch in fetches]),
+        "llm_calls_per_crawl": round(len(iterations) / completed, 2) if completed else 0.0,
+        "fetches_per_crawl": round(len(fetches) / completed, 2) if completed else 0.0,
+        "fetch_sources": {
+            source: sum(1 for fetch in fetches if fetch["source"] == source)
+            for source in sorted({fetch["source"] for fetch in fetches})
+        },
+        "tokens_per_crawl": {
+            field: round(sum(total[field] for total in totals) / completed, 1) if completed else 0.0
+            for field in ("prompt_tokens", "completion_tokens", "cached_tokens")
+        },
+        "llm_share": round(llm_ms / total_ms, 3) if total_ms else 0.0,
+        "tool_share": round(tool_ms / total_ms, 3) if total_ms else 0.0,
+        "errors": sorted(set(errors)),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"\n{report['crawls']} crawls ({report['failed']} failed) in {report['wall_s']}s - "
+        f"{report['throughput_crawls_per_s']} crawls/s"
+    )
+    print(f"{'':<16}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+    for name in ("end_to_end_ms", "iteration_ms", "llm_call_ms", "fetch_ms"):
+        row = report[name]
+        print(f"{name:<16}{row['mean']:>10}{row['p50']:>10}{row['p95']:>10}{row['max']:>10}")
+    print(
+        f"LLM calls per crawl: {report['llm_calls_per_crawl']}, "
+        f"fetches per crawl: {report['fetches_per_crawl']}"
+    )
+    print(f"Fetch sources: {report['fetch_sources']}")
+    print(f"Tokens per crawl: {report['tokens_per_crawl']}")
+    print(
+        f"Time split: {report['llm_share']:.1%} waiting for the model, "
+        f"{report['tool_share']:.1%} running tool calls, the rest fetching the initial URL "
+        f"and other work"
+    )
+    for error in report["errors"]:
+        print(f"Error: {error}")
+
+
+async def _start(app: web.Application) -> Tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    agent_server = AgentServer(latency_ms=args.agent_latency_ms)
+    agent_runner, agent_base_url = await _start(agent_server.create_app())
+    fake_llm = FakeLLM(
+        script=load_script(args.script) if args.script else None,
+        agent_base_url=agent_base_url,
+        latency_ms=args.llm_latency_ms,
+        completion_tokens=args.completion_tokens,
+        cached_tokens=args.cached_tokens,
+        model_name=BENCHMARK_MODEL,
+    )
+    llm_runner, llm_base_url = await _start(fake_llm.create_app())
+
+    # config.py reads the environment when it is imported, so it is set up first
+    os.environ["MODEL_PROVIDER"] = "openai"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"{llm_base_url}/v1"
+    os.environ["OPENAI_MODEL"] = BENCHMARK_MODEL
+    os.environ["ANP_ANSWER_CACHE_TTL"] = "0"
+    simple_example = importlib.import_module("anp_examples.simple_example")
+    llm_clients = importlib.import_module("anp_examples.llm_clients")
+    anp_tool_module = importlib.import_module("anp_examples.anp_tool")
+
+    llm_client, model_name = llm_clients.get_llm_client("openai")
+    anp_tool = anp_tool_module.ANPTool()
+    initial_url = agent_base_url + (args.initial_path or HOTEL_AD_PATH)
+    limit = asyncio.Semaphore(max(args.concurrency, 1))
+
+    async def crawl(index: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Run one crawl, returning (metrics, None) or (None, error)"""
+        async with limit:
+            try:
+                result = await simple_example.simple_crawl(
+                    f"Benchmark query {index}: find a sea view room",
+                    max_documents=args.max_documents,
+                    initial_url=initial_url,
+                    anp_tool=anp_tool,
+                    llm_client=llm_client,
+                    model_name=model_name,
+                    bypass_cache=True,
+                    collect_metrics=True,
+                )
+            except Exception as e:
+                return None, f"{type(e).__name__}: {str(e)}"
+            if result.get("type") == "error" or "metrics" not in result:
+                return None, result.get("content")
+            return result["metrics"], None
+
+    try:
+        for _ in range(args.warmup):
+            await crawl(-1)
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(crawl(i) for i in range(args.crawls)))
+        wall_s = time.perf_counter() - started
+    finally:
+        await anp_tool.close()
+        await llm_clients.close_llm_clients()
+        await llm_runner.cleanup()
+        await agent_runner.cleanup()
+
+    report = summarize(
+        [metrics for metrics, _ in outcomes if metrics is not None],
+        [error for _, error in outcomes if error is not None],
+        wall_s,
+    )
+    report["config"] = {
+        "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency_ms,
+        "agent_latency_ms": args.agent_latency_ms,
+        "max_documents": args.max_documents,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simple_crawl against local servers")
+    parser.add_argument("--crawls", type=int, default=10, help="Crawls to run")
+    parser.add_argument("--concurrency", type=int, default=1, help="Crawls running at the same time")
+    parser.add_argument("--warmup", type=int, default=1, help="Crawls run before measuring")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--agent-latency-ms", type=float, default=50.0)
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--cached-tokens", type=int, default=0)
+    parser.add_argument("--max-documents", type=int, default=10)
+    parser.add_argument("--script", help="JSON file with the fake model's steps")
+    parser.add_argument("--initial-path", help="Path on the agent server to start crawling at")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING))
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
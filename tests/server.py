@@ -0,0 +1,35 @@
+"""
+Local aiohttp test server used by the tests.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from aiohttp import web
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+@asynccontextmanager
+async def serve(handler: Handler) -> AsyncIterator[str]:
+    """
+    Serve handler for every path on a free local port
+
+    Yields:
+        str: Base URL of the server, e.g. http://127.0.0.1:40123
+    """
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+def client_gone(request: web.Request) -> bool:
+    """Whether the client has closed the connection of request"""
+    return request.transport is None or request.transport.is_closing()
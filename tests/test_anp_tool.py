@@ -0,0 +1,57 @@
+import asyncio
+import socket
+import time
+
+from aiohttp import web
+
+from anp_examples.anp_tool import ANPTool
+from tests.server import serve
+
+
+def _closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/missing"
+
+
+def test_execute_many_does_not_let_a_busy_host_block_others():
+    async def scenario():
+        finished = {}
+
+        async def handler(request):
+            await asyncio.sleep(0.25)
+            finished[request.path] = time.monotonic()
+            return web.json_response({"path": request.path})
+
+        async with serve(handler) as base_url:
+            # localhost and 127.0.0.1 are different hosts to ANPTool
+            other_host_url = base_url.replace("127.0.0.1", "localhost")
+            requests = [{"url": f"{base_url}/a{i}"} for i in range(4)]
+            requests.append({"url": f"{other_host_url}/b"})
+            tool = ANPTool()
+            try:
+                started = time.monotonic()
+                results = await tool.execute_many(requests, concurrency=2, per_host_concurrency=1)
+            finally:
+                await tool.close()
+        return results, finished["/b"] - started
+
+    results, other_host_s = asyncio.run(scenario())
+    assert [result["path"] for result in results] == ["/a0", "/a1", "/a2", "/a3", "/b"]
+    assert other_host_s < 0.6
+
+
+def test_execute_many_errors_carry_their_url():
+    async def scenario():
+        url = _closed_port_url()
+        tool = ANPTool()
+        try:
+            return url, await tool.execute_many([{"url": url}, {"url": url, "method": "POST"}])
+        finally:
+            await tool.close()
+
+    url, results = asyncio.run(scenario())
+    for result in results:
+        assert "error" in result
+        assert result["url"] == url
@@ -0,0 +1,69 @@
+import time
+
+from anp_examples.answer_cache import AnswerCache
+
+
+def _result(**fields):
+    result = {
+        "content": "The hotel has sea view rooms",
+        "type": "text",
+        "visited_urls": ["https://agent.example/ad.json"],
+        "crawled_documents": [{"url": "https://agent.example/ad.json", "content": {"name": "Hotel"}}],
+        "task_type": "general",
+    }
+    result.update(fields)
+    return result
+
+
+def test_queries_are_normalized_into_one_key():
+    key = AnswerCache.make_key("Sea  view ROOMS", " https://agent.example/ad.json", "general", "m")
+    assert key == AnswerCache.make_key("sea view rooms", "https://agent.example/ad.json", "general", "m")
+
+
+def test_runs_without_document_contents_do_not_answer_full_runs():
+    cache = AnswerCache(ttl=60)
+    stripped = cache.make_key("q", "https://agent.example/ad.json", "general", "m", keep_documents=False)
+    full = cache.make_key("q", "https://agent.example/ad.json", "general", "m", keep_documents=True)
+    cache.put(stripped, _result(crawled_documents=[{"url": "https://agent.example/ad.json"}]))
+    assert cache.get(full) is None
+    assert cache.get(stripped)["cached"] is True
+
+
+def test_cached_results_are_copies():
+    cache = AnswerCache(ttl=60)
+    key = cache.make_key("q", "https://agent.example/ad.json", "general", "m")
+    result = _result()
+    cache.put(key, result)
+    result["crawled_documents"][0]["content"]["name"] = "changed by the caller"
+
+    first = cache.get(key)
+    first["crawled_documents"].clear()
+    second = cache.get(key)
+    assert second["crawled_documents"][0]["content"] == {"name": "Hotel"}
+    assert "cached" not in result
+
+
+def test_partial_and_failed_answers_are_not_stored():
+    cache = AnswerCache(ttl=60)
+    key = cache.make_key("q", "https://agent.example/ad.json", "general", "m")
+    cache.put(key, _result(partial=True))
+    cache.put(key, _result(type="error"))
+    assert cache.get(key) is None
+    assert cache.stats["miss"] == 1
+
+
+def test_answers_expire_after_the_ttl():
+    cache = AnswerCache(ttl=0.05)
+    key = cache.make_key("q", "https://agent.example/ad.json", "general", "m")
+    cache.put(key, _result())
+    assert cache.get(key) is not None
+    time.sleep(0.06)
+    assert cache.get(key) is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = AnswerCache(ttl=0)
+    key = cache.make_key("q", "https://agent.example/ad.json", "general", "m")
+    cache.put(key, _result())
+    assert not cache.enabled
+    assert cache.get(key) is None
@@ -0,0 +1,92 @@
+import asyncio
+
+from aiohttp import web
+
+from anp_examples.anp_tool import ANPTool
+from anp_examples.cassette import RECORD, REPLAY, Cassette
+from tests.server import serve
+
+
+async def _documents(request):
+    if request.path == "/api.yaml":
+        return web.Response(text="paths: {}\n", content_type="application/yaml")
+    return web.json_response({"path": request.path, "query": dict(request.query)})
+
+
+def test_recorded_exchanges_replay_without_the_network(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+
+    async def record():
+        async with serve(_documents) as base_url:
+            tool = ANPTool(cassette=Cassette(path, RECORD))
+            try:
+                results = [
+                    await tool.execute(f"{base_url}/ad.json"),
+                    await tool.execute(f"{base_url}/search", params={"q": "sea view"}),
+                    await tool.execute(f"{base_url}/api.yaml"),
+                ]
+            finally:
+                await tool.close()
+        return base_url, results
+
+    async def replay(base_url):
+        tool = ANPTool(cassette=Cassette(path, REPLAY))
+        try:
+            results = [
+                await tool.execute(f"{base_url}/ad.json"),
+                await tool.execute(f"{base_url}/search", params={"q": "sea view"}),
+                await tool.execute(f"{base_url}/api.yaml"),
+                await tool.execute(f"{base_url}/never-recorded"),
+            ]
+        finally:
+            await tool.close()
+        return results, tool.cassette.stats
+
+    base_url, recorded = asyncio.run(record())
+    replayed, stats = asyncio.run(replay(base_url))
+    for before, after in zip(recorded, replayed):
+        assert after["status_code"] == before["status_code"] == 200
+        assert after.get("data", after.get("path")) == before.get("data", before.get("path"))
+    assert replayed[1]["query"] == {"q": "sea view"}
+    assert replayed[3]["error_type"] == "cassette_miss"
+    assert stats == {"recorded": 0, "replayed": 3, "missed": 1}
+
+
+def test_record_writes_in_the_background(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+
+    async def scenario():
+        cassette = Cassette(path, RECORD)
+        for index in range(3):
+            cassette.record("GET", f"https://agent.example/{index}", None, None, {}, 200, {}, b"{}")
+        written_before_flush = path.exists()
+        await cassette.close()
+        return written_before_flush
+
+    assert asyncio.run(scenario()) is False
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [line.count("https://agent.example/") for line in lines] == [1, 1, 1]
+    assert "https://agent.example/0" in lines[0] and "https://agent.example/2" in lines[2]
+
+
+def test_credentials_are_never_recorded(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+
+    async def scenario():
+        cassette = Cassette(path, RECORD)
+        cassette.record(
+            "GET",
+            "https://agent.example/ad.json",
+            None,
+            None,
+            {"Authorization": "DIDWba secret", "Accept": "application/json"},
+            200,
+            {"Set-Cookie": "session=secret", "Content-Type": "application/json"},
+            b"{}",
+        )
+        await cassette.close()
+
+    asyncio.run(scenario())
+    text = path.read_text(encoding="utf-8")
+    assert "secret" not in text
+    assert "application/json" in text
@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from aiohttp import web
+
+from anp_examples import content_encoding
+from anp_examples.anp_tool import ANPTool
+from anp_examples.content_encoding import DecompressionError, StreamDecoder
+from tests.server import serve
+
+DOCUMENT = b'{"name": "Hotel", "rooms": [' + b", ".join(b'{"id": %d}' % i for i in range(2000)) + b"]}"
+
+# Decodes to 64 MiB, far more than any limit used below
+BOMB_SIZE = 64 << 20
+LIMIT = 1 << 20
+CHUNK = 64 * 1024
+
+requires_brotli = pytest.mark.skipif(
+    content_encoding.brotli is None, reason="brotli 1.2+ is not installed"
+)
+requires_zstd = pytest.mark.skipif(
+    content_encoding.zstandard is None, reason="zstandard is not installed"
+)
+
+
+def _decode(encoding: str, body: bytes, limit: int = 1 << 30, chunk: int = 1000) -> bytes:
+    decoder = StreamDecoder(encoding)
+    out = b""
+    for start in range(0, len(body), chunk):
+        out += decoder.decompress(body[start : start + chunk], limit - len(out))
+    return out + decoder.flush()
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data)
+    if encoding == "br":
+        return content_encoding.brotli.compress(data, quality=5)
+    return content_encoding.zstandard.ZstdCompressor().compress(data)
+
+
+def test_gzip_is_always_offered():
+    assert "gzip" in content_encoding.ACCEPT_ENCODING
+    assert "deflate" in content_encoding.ACCEPT_ENCODING
+
+
+def test_identity_bodies_pass_through():
+    assert _decode(None, DOCUMENT) == DOCUMENT
+    assert _decode("identity", DOCUMENT) == DOCUMENT
+
+
+def test_gzip_is_decoded_in_chunks():
+    assert _decode("gzip", gzip.compress(DOCUMENT)) == DOCUMENT
+    assert _decode("x-gzip", gzip.compress(DOCUMENT)) == DOCUMENT
+
+
+def test_wrapped_and_raw_deflate_are_both_decoded():
+    raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw_body = raw.compress(DOCUMENT) + raw.flush()
+    assert _decode("deflate", zlib.compress(DOCUMENT)) == DOCUMENT
+    assert _decode("deflate", raw_body) == DOCUMENT
+
+
+@pytest.mark.parametrize(
+    "encoding",
+    ["gzip", pytest.param("br", marks=requires_brotli), pytest.param("zstd", marks=requires_zstd)],
+)
+def test_one_chunk_of_a_bomb_decodes_to_little_more_than_the_limit(encoding):
+    bomb = _compress(encoding, b"\0" * BOMB_SIZE)
+    out = StreamDecoder(encoding).decompress(bomb[:CHUNK], LIMIT)
+    assert LIMIT < len(out) <= 2 * LIMIT + 256 * 1024
+
+
+@pytest.mark.parametrize(
+    "encoding",
+    ["gzip", pytest.param("br", marks=requires_brotli), pytest.param("zstd", marks=requires_zstd)],
+)
+def test_round_trip(encoding):
+    assert _decode(encoding, _compress(encoding, DOCUMENT)) == DOCUMENT
+
+
+def test_unsupported_and_corrupt_bodies_raise():
+    with pytest.raises(DecompressionError):
+        StreamDecoder("compress")
+    with pytest.raises(DecompressionError):
+        _decode("gzip", b"not gzip at all")
+
+
+def test_anp_tool_rejects_bodies_that_decode_past_the_limit():
+    bomb = gzip.compress(b" " * (8 << 20))
+
+    async def scenario():
+        async def handler(request):
+            if request.path == "/bomb":
+                body = bomb
+            else:
+                body = gzip.compress(DOCUMENT)
+            return web.Response(
+                body=body, headers={"Content-Encoding": "gzip", "Content-Type": "application/json"}
+            )
+
+        async with serve(handler) as base_url:
+            tool = ANPTool(max_response_bytes=LIMIT)
+            try:
+                return (
+                    await tool.execute(f"{base_url}/bomb"),
+                    await tool.execute(f"{base_url}/document"),
+                )
+            finally:
+                await tool.close()
+
+    rejected, document = asyncio.run(scenario())
+    assert rejected["error_type"] == "response_too_large"
+    assert rejected["status_code"] == 502
+    assert document["name"] == "Hotel"
+    assert document["timing"]["bytes"] == len(DOCUMENT)
+    assert document["timing"]["wire_bytes"] < len(DOCUMENT) / 5
@@ -0,0 +1,110 @@
+import json
+
+from anp_examples.context_budget import ContextBudget, digest_tool_result, estimate_tokens
+
+
+def _document(index: int) -> str:
+    return json.dumps(
+        {
+            "url": f"https://agent.example/doc{index}.json",
+            "status_code": 200,
+            "name": f"Document {index}",
+            "description": "x" * 2000,
+            "interfaces": [{"url": f"https://agent.example/api{index}.yaml"}],
+        }
+    )
+
+
+def _history(turns: int):
+    messages = [
+        {"role": "system", "content": "You crawl agent descriptions."},
+        {"role": "user", "content": "Find a sea view room"},
+    ]
+    for index in range(turns):
+        call_id = f"call_{index}"
+        messages.append(
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": call_id,
+                        "type": "function",
+                        "function": {"name": "anp_tool", "arguments": json.dumps({"url": f"doc{index}"})},
+                    }
+                ],
+            }
+        )
+        messages.append({"role": "tool", "tool_call_id": call_id, "content": _document(index)})
+    return messages
+
+
+def _compacted(messages):
+    return [
+        json.loads(message["content"]).get("compacted", False)
+        for message in messages
+        if message["role"] == "tool"
+    ]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("酒店预订") == 4
+
+
+def test_digest_keeps_what_is_needed_to_navigate():
+    digest = json.loads(digest_tool_result(_document(1)))
+    assert digest["compacted"] is True
+    assert digest["url"] == "https://agent.example/doc1.json"
+    assert digest["status_code"] == 200
+    assert "https://agent.example/api1.yaml" in digest["links"]
+    assert "description" not in digest
+
+
+def test_history_within_budget_is_left_alone():
+    messages = _history(3)
+    before = json.dumps(messages)
+    assert ContextBudget(max_tokens=100000).compact(messages) == 0
+    assert ContextBudget(max_tokens=0).compact(messages) == 0
+    assert json.dumps(messages) == before
+
+
+def test_oldest_tool_results_are_compacted_first():
+    messages = _history(5)
+    budget = ContextBudget(max_tokens=2000, keep_recent_turns=2)
+    saved = budget.compact(messages)
+    assert saved > 0
+    assert _compacted(messages) == [True, True, False, False, False]
+    assert messages[0]["content"] == "You crawl agent descriptions."
+    assert messages[1]["content"] == "Find a sea view room"
+    assert budget.total_tokens(messages) <= 2000
+
+
+def test_recent_turns_are_kept_even_over_budget():
+    messages = _history(5)
+    budget = ContextBudget(max_tokens=500, keep_recent_turns=2)
+    budget.compact(messages)
+    assert _compacted(messages) == [True, True, True, False, False]
+    assert budget.total_tokens(messages) > 500
+
+
+def test_compacted_history_stays_byte_identical():
+    messages = _history(5)
+    budget = ContextBudget(max_tokens=2000, keep_recent_turns=2)
+    budget.compact(messages)
+    prefix = json.dumps(messages)
+    assert budget.compact(messages) == 0
+    assert json.dumps(messages) == prefix
+
+
+def test_results_compacted_before_stay_compacted():
+    budget = ContextBudget(max_tokens=2000, keep_recent_turns=2)
+    messages = _history(5)
+    budget.compact(messages)
+    compacted_content = messages[3]["content"]
+
+    # The caller rebuilds the history from the full results, e.g. after a retry
+    rebuilt = _history(5)
+    budget.compact(rebuilt)
+    assert rebuilt[3]["content"] == compacted_content
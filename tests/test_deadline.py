@@ -0,0 +1,39 @@
+import time
+
+from anp_examples.deadline import CrawlDeadline
+
+
+def test_no_deadline_without_a_timeout():
+    for timeout in (None, 0, -1):
+        deadline = CrawlDeadline(timeout)
+        assert deadline.remaining() is None
+        assert deadline.remaining_for_crawling() is None
+        assert deadline.stop_reason(used_tokens=10**9) is None
+
+
+def test_summary_reserve_is_kept_out_of_the_crawling_time():
+    deadline = CrawlDeadline(timeout=100, summary_reserve=10)
+    assert 99 < deadline.remaining() <= 100
+    assert 89 < deadline.remaining_for_crawling() <= 90
+
+
+def test_summary_reserve_is_at_most_a_quarter_of_the_timeout():
+    assert CrawlDeadline(timeout=8, summary_reserve=30).summary_reserve == 2
+
+
+def test_crawling_stops_when_only_the_reserve_is_left():
+    deadline = CrawlDeadline(timeout=0.2, summary_reserve=0.05)
+    assert deadline.stop_reason(used_tokens=0) is None
+    time.sleep(0.16)
+    assert deadline.stop_reason(used_tokens=0) == "deadline"
+    assert deadline.remaining() > 0
+    time.sleep(0.05)
+    assert deadline.remaining() == 0
+    assert deadline.remaining_for_crawling() == 0
+
+
+def test_token_budget():
+    deadline = CrawlDeadline(timeout=None, token_budget=1000)
+    assert deadline.stop_reason(used_tokens=999) is None
+    assert deadline.stop_reason(used_tokens=1000) == "token_budget"
+    assert CrawlDeadline(token_budget=0).stop_reason(used_tokens=10**9) is None
@@ -0,0 +1,21 @@
+import pytest
+
+from anp_examples.utils.env import env_flag
+
+
+@pytest.mark.parametrize("value", ["1", "true", "TRUE", "yes", " Yes "])
+def test_enabled_values(monkeypatch, value):
+    monkeypatch.setenv("ANP_TEST_FLAG", value)
+    assert env_flag("ANP_TEST_FLAG", False) is True
+
+
+@pytest.mark.parametrize("value", ["0", "false", "no", "off", ""])
+def test_other_values_disable(monkeypatch, value):
+    monkeypatch.setenv("ANP_TEST_FLAG", value)
+    assert env_flag("ANP_TEST_FLAG", True) is False
+
+
+def test_default_when_unset(monkeypatch):
+    monkeypatch.delenv("ANP_TEST_FLAG", raising=False)
+    assert env_flag("ANP_TEST_FLAG", True) is True
+    assert env_flag("ANP_TEST_FLAG", False) is False
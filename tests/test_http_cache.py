@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from anp_examples.anp_tool import ANPTool
+from anp_examples.http_cache import CacheEntry, HTTPCache, freshness_lifetime
+from tests.server import serve
+
+
+def _entry(body: bytes = b"{}") -> CacheEntry:
+    now = time.monotonic()
+    return CacheEntry(200, body, "application/json", "utf-8", None, None, now + 60, now + 60)
+
+
+def test_freshness_lifetime_of_max_age_less_age():
+    assert freshness_lifetime({"Cache-Control": "max-age=60", "Age": "15"}) == (45, 0, False)
+
+
+def test_freshness_lifetime_with_stale_while_revalidate():
+    headers = {"Cache-Control": "max-age=10, stale-while-revalidate=30"}
+    assert freshness_lifetime(headers) == (10, 30, False)
+
+
+def test_no_cache_responses_must_be_revalidated():
+    headers = {"Cache-Control": "no-cache, stale-while-revalidate=30"}
+    assert freshness_lifetime(headers) == (0, 0, True)
+
+
+def test_responses_that_must_not_be_stored():
+    assert freshness_lifetime({"Cache-Control": "no-store, max-age=60"})[0] is None
+    assert freshness_lifetime({"Cache-Control": "max-age=60", "Vary": "*"})[0] is None
+
+
+def test_expires_is_used_without_max_age():
+    headers = {"Expires": "Thu, 01 Jan 2099 00:00:10 GMT", "Date": "Thu, 01 Jan 2099 00:00:00 GMT"}
+    assert freshness_lifetime(headers)[0] == 10
+
+
+def test_entries_without_freshness_or_validators_are_not_stored():
+    assert CacheEntry.from_response(200, {}, b"{}", "application/json", "utf-8") is None
+    entry = CacheEntry.from_response(200, {"ETag": '"v1"'}, b"{}", "application/json", "utf-8")
+    assert entry is not None and not entry.is_fresh()
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+
+
+def test_cache_evicts_least_recently_used_entries_over_budget():
+    cache = HTTPCache(max_bytes=3 * _entry().size)
+    for key in ("a", "b", "c"):
+        cache.put(key, _entry())
+    cache.get("a")
+    cache.put("d", _entry())
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.stats["evictions"] == 1
+    assert cache.current_bytes == 3 * _entry().size
+
+
+def test_entries_larger_than_the_budget_are_not_stored():
+    cache = HTTPCache(max_bytes=100)
+    cache.put("large", _entry(b"x" * 200))
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+async def _cached_document(request):
+    return web.json_response({"name": "Hotel"}, headers={"Cache-Control": "max-age=60"})
+
+
+def test_each_lookup_is_counted_once():
+    async def scenario():
+        async with serve(_cached_document) as base_url:
+            tool = ANPTool()
+            try:
+                url = f"{base_url}/ad.json"
+                await tool.execute(url)
+                await tool.execute(url)
+                await tool.execute(url, headers={"Cache-Control": "no-cache"})
+            finally:
+                await tool.close()
+        return tool.cache.stats
+
+    stats = asyncio.run(scenario())
+    assert (stats["miss"], stats["hit"], stats["bypass"]) == (1, 1, 1)
+
+
+def test_etag_revalidation_reuses_the_cached_body():
+    async def scenario():
+        conditional = []
+
+        async def handler(request):
+            conditional.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304, headers={"ETag": '"v1"', "Cache-Control": "no-cache"})
+            return web.json_response(
+                {"name": "Hotel"}, headers={"ETag": '"v1"', "Cache-Control": "no-cache"}
+            )
+
+        async with serve(handler) as base_url:
+            tool = ANPTool()
+            try:
+                first = await tool.execute(f"{base_url}/ad.json")
+                second = await tool.execute(f"{base_url}/ad.json")
+            finally:
+                await tool.close()
+        return conditional, first, second
+
+    conditional, first, second = asyncio.run(scenario())
+    assert conditional == [None, '"v1"']
+    assert first["cache"] == "miss" and second["cache"] == "revalidated"
+    assert second["name"] == "Hotel" and second["status_code"] == 200
+
+
+def test_stale_entries_are_served_while_revalidating():
+    async def scenario():
+        versions = iter(["v1", "v2", "v3"])
+
+        async def handler(request):
+            return web.json_response(
+                {"version": next(versions)},
+                headers={"Cache-Control": "max-age=0, stale-while-revalidate=60"},
+            )
+
+        async with serve(handler) as base_url:
+            tool = ANPTool()
+            try:
+                url = f"{base_url}/ad.json"
+                first = await tool.execute(url)
+                stale = await tool.execute(url)
+                await asyncio.sleep(0.2)
+                refreshed = await tool.execute(url)
+            finally:
+                await tool.close()
+        return first, stale, refreshed
+
+    first, stale, refreshed = asyncio.run(scenario())
+    assert (first["version"], first["cache"]) == ("v1", "miss")
+    assert (stale["version"], stale["cache"]) == ("v1", "stale")
+    assert (refreshed["version"], refreshed["cache"]) == ("v2", "stale")
+
+
+def test_responses_varying_on_request_headers_are_not_mixed_up():
+    async def scenario():
+        async def handler(request):
+            headers = {"Cache-Control": "max-age=60", "Vary": "Accept"}
+            if "yaml" in request.headers.get("Accept", ""):
+                return web.Response(text="name: Hotel\n", content_type="application/yaml", headers=headers)
+            return web.json_response({"name": "Hotel"}, headers=headers)
+
+        async with serve(handler) as base_url:
+            tool = ANPTool()
+            try:
+                url = f"{base_url}/ad"
+                as_json = await tool.execute(url)
+                as_yaml = await tool.execute(url, headers={"Accept": "application/yaml"})
+                as_yaml_again = await tool.execute(url, headers={"accept": "application/yaml"})
+            finally:
+                await tool.close()
+        return as_json, as_yaml, as_yaml_again
+
+    as_json, as_yaml, as_yaml_again = asyncio.run(scenario())
+    assert as_json["name"] == "Hotel"
+    assert as_yaml["format"] == "yaml" and as_yaml["cache"] == "miss"
+    assert as_yaml_again["format"] == "yaml" and as_yaml_again["cache"] == "hit"
@@ -0,0 +1,31 @@
+import pytest
+
+from anp_examples import llm_clients
+
+
+@pytest.fixture(autouse=True)
+def _registry(monkeypatch):
+    monkeypatch.setattr(llm_clients, "OPENAI_MODEL", "openai-model")
+    monkeypatch.setattr(llm_clients, "DASHSCOPE_MODEL_NAME", "dashscope-model")
+    monkeypatch.setenv("MODEL_PROVIDER", "openai")
+    yield
+    llm_clients.set_llm_client(None)
+
+
+def test_resolve_model_name_creates_no_client():
+    clients_before = dict(llm_clients._clients)
+    assert llm_clients.resolve_model_name() == "openai-model"
+    assert llm_clients.resolve_model_name("DashScope") == "dashscope-model"
+    assert llm_clients._clients == clients_before
+
+
+def test_resolve_model_name_follows_the_injected_client():
+    llm_clients.set_llm_client(object(), "fake-model")
+    assert llm_clients.resolve_model_name() == "fake-model"
+    llm_clients.set_llm_client(object())
+    assert llm_clients.resolve_model_name() == "openai-model"
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        llm_clients.resolve_model_name("unknown")
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from anp_examples.anp_tool import ANPTool
+from anp_examples.resilience import CircuitBreaker, RetryPolicy
+from tests.server import client_gone, serve
+
+
+def test_only_idempotent_methods_are_retried():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.attempts_for("get") == 3
+    assert policy.attempts_for("PUT") == 3
+    assert policy.attempts_for("POST") == 1
+    assert policy.attempts_for("PATCH") == 1
+
+
+def test_backoff_honors_retry_after_up_to_the_maximum():
+    policy = RetryPolicy(base_delay=0.2, max_delay=5.0)
+    assert policy.delay(0, retry_after="2") == 2.0
+    assert policy.delay(0, retry_after="600") == 5.0
+    assert 0 <= policy.delay(10, retry_after="soon") <= 5.0
+    assert 0 <= policy.delay(0) <= 0.2
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 59 < breaker.retry_in() <= 60
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+
+def test_trial_without_outcome_is_replaced_after_the_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.retry_in() > 0
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_released_trial_lets_the_next_request_try():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+
+
+async def _failing(request):
+    if request.path == "/slow":
+        while not client_gone(request):
+            await asyncio.sleep(0.02)
+    return web.json_response({"error": "broken"}, status=500)
+
+
+def test_cancelled_trial_does_not_leave_the_circuit_half_open():
+    async def scenario():
+        async with serve(_failing) as base_url:
+            tool = ANPTool(circuit_failure_threshold=2, circuit_reset_timeout=0.1)
+            breaker = tool.hosts.breaker(base_url.split("//", 1)[1])
+            try:
+                for _ in range(2):
+                    await tool.execute(f"{base_url}/fail")
+                opened = breaker.state
+                await asyncio.sleep(0.15)
+                trial = await tool.execute(f"{base_url}/slow", timeout=0.1)
+                after_trial = breaker.state
+                next_request = await tool.execute(f"{base_url}/fail")
+            finally:
+                await tool.close()
+        return opened, trial, after_trial, next_request
+
+    opened, trial, after_trial, next_request = asyncio.run(scenario())
+    assert opened == CircuitBreaker.OPEN
+    assert trial["error_type"] == "deadline_exceeded"
+    assert after_trial == CircuitBreaker.OPEN
+    assert next_request.get("error_type") != "circuit_open"
+    assert next_request["status_code"] == 500
+
+
+def test_error_statuses_of_non_idempotent_requests_do_not_open_the_circuit():
+    async def scenario():
+        async with serve(_failing) as base_url:
+            tool = ANPTool(circuit_failure_threshold=2)
+            breaker = tool.hosts.breaker(base_url.split("//", 1)[1])
+            try:
+                for _ in range(3):
+                    await tool.execute(f"{base_url}/book", method="POST", body={})
+                after_posts = breaker.state
+                for _ in range(2):
+                    await tool.execute(f"{base_url}/fail")
+                after_gets = breaker.state
+            finally:
+                await tool.close()
+        return after_posts, after_gets
+
+    after_posts, after_gets = asyncio.run(scenario())
+    assert after_posts == CircuitBreaker.CLOSED
+    assert after_gets == CircuitBreaker.OPEN
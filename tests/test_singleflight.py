@@ -0,0 +1,99 @@
+import asyncio
+
+from aiohttp import web
+
+from anp_examples.anp_tool import ANPTool
+from anp_examples.singleflight import SingleFlight
+from tests.server import client_gone, serve
+
+
+def test_concurrent_calls_share_one_result():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        outcomes = await asyncio.gather(flight.do("key", fetch), flight.do("key", fetch))
+        return calls, outcomes, len(flight)
+
+    calls, outcomes, in_flight = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert sorted(outcomes) == [("result", False), ("result", True)]
+    assert in_flight == 0
+
+
+def test_cancelled_waiter_leaves_the_call_to_the_others():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.1)
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    (result, shared), first_cancelled = asyncio.run(scenario())
+    assert result == "result" and shared
+    assert first_cancelled
+
+
+def test_call_is_cancelled_with_its_last_waiter():
+    async def scenario():
+        flight = SingleFlight()
+        state = {"cancelled": False}
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        waiters = [asyncio.ensure_future(flight.do("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        return state["cancelled"], len(flight)
+
+    cancelled, in_flight = asyncio.run(scenario())
+    assert cancelled
+    assert in_flight == 0
+
+
+def test_execute_deadline_aborts_the_upstream_request():
+    async def scenario():
+        state = {"requests": 0, "aborted": False}
+
+        async def slow(request):
+            state["requests"] += 1
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if client_gone(request):
+                    state["aborted"] = True
+                    break
+            return web.json_response({})
+
+        async with serve(slow) as base_url:
+            tool = ANPTool()
+            try:
+                result = await tool.execute(f"{base_url}/slow", timeout=0.2)
+                await asyncio.sleep(0.3)
+                in_flight = len(tool._in_flight)
+            finally:
+                await tool.close()
+        return result, state, in_flight
+
+    result, state, in_flight = asyncio.run(scenario())
+    assert result["error_type"] == "deadline_exceeded"
+    assert state == {"requests": 1, "aborted": True}
+    assert in_flight == 0
@@ -0,0 +1,60 @@
+import asyncio
+
+from aiohttp import web
+
+from anp_examples.anp_tool import ANPTool
+from anp_examples.utils import yaml_codec
+from tests.server import serve
+
+INTERFACE = b"openapi: 3.0.0\npaths:\n  /rooms:\n    get:\n      summary: List rooms\n"
+
+
+def setup_function():
+    yaml_codec.clear_cache()
+
+
+def test_loads_cached_reuses_the_parse():
+    first = yaml_codec.loads_cached(INTERFACE)
+    second = yaml_codec.loads_cached(INTERFACE)
+    assert first == second
+    assert yaml_codec.cache_info()["hits"] == 1
+    assert yaml_codec.cache_info()["misses"] == 1
+
+
+def test_loads_cached_returns_documents_owned_by_the_caller():
+    first = yaml_codec.loads_cached(INTERFACE)
+    first["paths"]["/rooms"]["get"]["summary"] = "changed"
+    del first["openapi"]
+    second = yaml_codec.loads_cached(INTERFACE)
+    assert second["openapi"] == "3.0.0"
+    assert second["paths"]["/rooms"]["get"]["summary"] == "List rooms"
+    assert first is not second
+
+
+def test_loads_cached_counts_empty_documents_as_hits():
+    assert yaml_codec.loads_cached(b"") is None
+    assert yaml_codec.loads_cached(b"") is None
+    assert yaml_codec.cache_info()["hits"] == 1
+
+
+def test_anp_tool_results_do_not_share_parsed_documents():
+    async def scenario():
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return web.Response(body=INTERFACE, content_type="application/yaml")
+
+        async with serve(handler) as base_url:
+            tool = ANPTool()
+            try:
+                url = f"{base_url}/api.yaml"
+                coalesced = await asyncio.gather(tool.execute(url), tool.execute(url))
+                coalesced[0]["data"]["paths"].clear()
+                later = await tool.execute(url)
+            finally:
+                await tool.close()
+        return coalesced, later
+
+    coalesced, later = asyncio.run(scenario())
+    assert any(result.get("coalesced") for result in coalesced)
+    assert coalesced[1]["data"]["paths"] == {"/rooms": {"get": {"summary": "List rooms"}}}
+    assert later["data"]["paths"] == {"/rooms": {"get": {"summary": "List rooms"}}}
@@ -1,19 +1,21 @@
 import os
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import sys
-import asyncio
-from urllib.parse import urlparse
+from contextlib import asynccontextmanager
 
 # Add project root directory to system path
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 
 from anp_examples.utils.log_base import setup_logging
+from anp_examples.utils import json_codec
+from anp_examples.utils.links import extract_links
 from anp_examples.anp_tool import ANPTool
+from anp_examples.llm_clients import close_llm_clients
 from web_app.backend.models import (
     QueryRequest,
     QueryResponse,
@@ -22,8 +24,15 @@ from web_app.backend.models import (
     GetDocumentRequest,
     GetDocumentResponse,
 )
+from web_app.backend.cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    ClientDisconnected,
+    iterate_until_disconnected,
+    run_until_disconnected,
+)
 from web_app.backend.hotel_order_api import router as hotel_order_router
-from anp_examples.simple_example import simple_crawl
+from web_app.backend.responses import CodecJSONResponse
+from anp_examples.simple_example import simple_crawl, simple_crawl_iter
 
 # Set up logging
 setup_logging(logging.INFO)
@@ -32,11 +41,31 @@ setup_logging(logging.INFO)
 BASE_DIR = Path(__file__).resolve().parent.parent
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 
+# Get DID paths
+did_document_path = str(ROOT_DIR / "use_did_test_public/did.json")
+private_key_path = str(ROOT_DIR / "use_did_test_public/key-1_private.pem")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one ANPTool (and its pooled HTTP session) and the LLM clients across all requests"""
+    app.state.anp_tool = ANPTool(
+        did_document_path=did_document_path, private_key_path=private_key_path
+    )
+    try:
+        yield
+    finally:
+        await app.state.anp_tool.close()
+        await close_llm_clients()
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="ANP Network Explorer",
     description="Agent Network Explorer application based on ANP protocol",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=CodecJSONResponse,
 )
 
 # 注册酒店订单API路由器
@@ -54,10 +83,6 @@ app.add_middleware(
 # Mount static files directory
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
-# Get DID paths
-did_document_path = str(ROOT_DIR / "use_did_test_public/did.json")
-private_key_path = str(ROOT_DIR / "use_did_test_public/key-1_private.pem")
-
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -126,8 +151,8 @@ async def health_check():
 
 
 @app.post("/api/query", response_model=QueryResponse)
-async def query(request: QueryRequest):
-    """Process query request"""
+async def query(request: QueryRequest, http_request: Request):
+    """Process query request, cancelling the crawl if the client disconnects"""
     try:
         # Use agent URL provided by user or default URL
         initial_url = (
@@ -137,19 +162,73 @@ async def query(request: QueryRequest):
         )
 
         # Call simple_crawl function
-        result = await simple_crawl(
+        result = await run_until_disconnected(
+            http_request,
+            simple_crawl(
+                user_input=request.query,
+                task_type="general",
+                did_document_path=did_document_path,
+                private_key_path=private_key_path,
+                max_documents=20,  # Crawl up to 10 documents
+                initial_url=initial_url,  # Pass in user provided URL
+                anp_tool=app.state.anp_tool,
+                bypass_cache=request.bypass_cache,
+            ),
+        )
+
+        return result
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except Exception as e:
+        logging.error(f"Error processing query: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+
+def format_sse(event: str, data) -> bytes:
+    """Encode one server-sent event"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + json_codec.dumps_bytes(data) + b"\n\n"
+
+
+@app.post("/api/query/stream")
+async def query_stream(request: QueryRequest, http_request: Request):
+    """
+    Process query request, streaming progress as server-sent events
+
+    Events: "document" for every fetched URL, "tool_call" for every tool call,
+    "token" for every fragment of model output, "model_message" for every model
+    response, then "final" with the crawl result or "error". The crawl is cancelled
+    when the client disconnects.
+    """
+    # Use agent URL provided by user or default URL
+    initial_url = (
+        request.agent_url
+        if request.agent_url
+        else "https://agent-search.ai/ad.json"
+    )
+
+    async def event_stream():
+        events = simple_crawl_iter(
             user_input=request.query,
             task_type="general",
             did_document_path=did_document_path,
             private_key_path=private_key_path,
-            max_documents=20,  # Crawl up to 10 documents
+            max_documents=20,  # Crawl up to 20 documents
             initial_url=initial_url,  # Pass in user provided URL
+            anp_tool=app.state.anp_tool,
+            bypass_cache=request.bypass_cache,
         )
+        try:
+            async for event in iterate_until_disconnected(http_request, events):
+                yield format_sse(event.name, event.data())
+        except Exception as e:
+            logging.error(f"Error processing streamed query: {str(e)}")
+            yield format_sse("error", {"detail": f"Error processing query: {str(e)}"})
 
-        return result
-    except Exception as e:
-        logging.error(f"Error processing query: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/api/agent-doc-tree", response_model=AgentDocTreeResponse)
@@ -163,10 +242,8 @@ async def agent_doc_tree(request: AgentDocTreeRequest):
             else "https://agent-search.ai/ad.json"
         )
 
-        # Initialize ANPTool
-        anp_tool = ANPTool(
-            did_document_path=did_document_path, private_key_path=private_key_path
-        )
+        # Use the shared ANPTool
+        anp_tool = app.state.anp_tool
 
         # Initialize sets of visited URLs and list of crawled documents
         visited_urls = set()
@@ -193,83 +270,35 @@ async def agent_doc_tree(request: AgentDocTreeRequest):
 async def crawl_doc_tree(
     url, anp_tool, visited_urls, crawled_documents, level=0, max_level=5, max_docs=30
 ):
-    """Function to recursively get documents and their linked content"""
-    # Return if already visited URL or reached max depth or document count limit
-    if url in visited_urls or level >= max_level or len(crawled_documents) >= max_docs:
-        return
-
-    try:
-        # Use ANPTool to get URL content
-        result = await anp_tool.execute(url=url)
-
-        # Record visited URL and obtained content
-        visited_urls.add(url)
-        crawled_documents.append({"url": url, "method": "GET", "content": result})
-
-        logging.info(f"Successfully obtained document: {url}, current depth: {level}")
+    """Function to get documents and their linked content level by level"""
+    frontier = [url]
 
-        # Extract links from document
-        links = extract_links(result)
+    # Stop at max depth or document count limit
+    while frontier and level < max_level and len(crawled_documents) < max_docs:
+        # Skip already visited URLs and keep within the document count limit
+        batch = [link for link in dict.fromkeys(frontier) if link not in visited_urls]
+        batch = batch[: max_docs - len(crawled_documents)]
+        if not batch:
+            break
+        visited_urls.update(batch)
 
-        # Recursively get linked documents
-        for link in links:
-            if len(crawled_documents) >= max_docs:
-                break
+        # Fetch the whole level concurrently with ANPTool
+        results = await anp_tool.execute_many([{"url": link} for link in batch])
 
-            # Skip already visited URLs
-            if link in visited_urls:
-                continue
-
-            await crawl_doc_tree(
-                link,
-                anp_tool,
-                visited_urls,
-                crawled_documents,
-                level + 1,
-                max_level,
-                max_docs,
-            )
-
-    except Exception as e:
-        logging.error(f"Failed to get document: {url}, error: {str(e)}")
-
-
-def extract_links(data):
-    """Extract links from JSON-LD document"""
-    links = set()
-
-    def traverse(obj):
-        if not obj or not isinstance(obj, dict):
-            return
+        next_frontier = []
+        for link, result in zip(batch, results):
+            # Record obtained content
+            crawled_documents.append({"url": link, "method": "GET", "content": result})
+            if "error" in result:
+                logging.error(f"Failed to get document: {link}, error: {result['error']}")
+            else:
+                logging.info(f"Successfully obtained document: {link}, current depth: {level}")
 
-        # Process links in specific fields
-        for key in ["@id", "url", "serviceEndpoint"]:
-            if key in obj and isinstance(obj[key], str) and is_valid_url(obj[key]):
-                links.add(obj[key])
+            # Extract links from document
+            next_frontier.extend(sorted(extract_links(result)))
 
-        # Check if other properties are objects or arrays
-        for key, value in obj.items():
-            if key == "@context":
-                continue  # Skip @context
-
-            if isinstance(value, dict):
-                traverse(value)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        traverse(item)
-
-    traverse(data)
-    return links
-
-
-def is_valid_url(url):
-    """Validate if URL is valid"""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except:
-        return False
+        frontier = next_frontier
+        level += 1
 
 
 def process_doc_tree(documents):
@@ -327,10 +356,8 @@ async def get_document(request: GetDocumentRequest):
         if not url:
             raise HTTPException(status_code=400, detail="URL parameter cannot be empty")
 
-        # Initialize ANPTool
-        anp_tool = ANPTool(
-            did_document_path=did_document_path, private_key_path=private_key_path
-        )
+        # Use the shared ANPTool
+        anp_tool = app.state.anp_tool
 
         # Use ANPTool to get URL content
         try:
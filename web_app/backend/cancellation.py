@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable
+
+from fastapi import Request
+
+# Seconds between checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 1.0
+
+# Non-standard status code (nginx) logged for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready"""
+
+
+async def run_until_disconnected(
+    request: Request, awaitable: Awaitable[Any], poll_interval: float = DISCONNECT_POLL_INTERVAL
+) -> Any:
+    """
+    Await a coroutine, cancelling it if the client disconnects first
+
+    Args:
+        request: Request of the client
+        awaitable: Work done for the request, e.g. a simple_crawl call
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        The result of the awaitable
+
+    Raises:
+        ClientDisconnected: If the client disconnected and the work was cancelled
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logging.info(f"Client disconnected from {request.url.path}, cancelling the request")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def iterate_until_disconnected(
+    request: Request, iterator: AsyncIterator[Any], poll_interval: float = DISCONNECT_POLL_INTERVAL
+) -> AsyncIterator[Any]:
+    """
+    Yield the items of an async generator until it ends or the client disconnects
+
+    The generator is closed in either case, which cancels the work behind it.
+
+    Args:
+        request: Request of the client
+        iterator: Async generator producing the response, e.g. simple_crawl_iter
+        poll_interval: Seconds between disconnect checks while waiting for an item
+    """
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=poll_interval)
+            if not done:
+                if await request.is_disconnected():
+                    logging.info(f"Client disconnected from {request.url.path}, cancelling the request")
+                    return
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield item
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await iterator.aclose()
@@ -7,6 +7,7 @@ class QueryRequest(BaseModel):
 
     query: str = Field(..., description="User's natural language query")
     agent_url: Optional[str] = Field(None, description="URL of the agent description JSON document")
+    bypass_cache: bool = Field(False, description="Crawl again even if a cached answer exists")
 
 
 class CrawledDocument(BaseModel):
@@ -25,6 +26,20 @@ class QueryResponse(BaseModel):
     visited_urls: List[str] = Field(..., description="List of visited URLs")
     crawled_documents: List[CrawledDocument] = Field(..., description="List of crawled documents")
     task_type: Optional[str] = Field(None, description="Task type")
+    cached: bool = Field(False, description="Whether the answer was served from the answer cache")
+    usage: Optional[Dict[str, int]] = Field(
+        None, description="Model calls and token usage, including prompt tokens served from the provider's cache"
+    )
+    partial: bool = Field(
+        False, description="Whether the crawl was stopped early and the answer is based on the documents obtained so far"
+    )
+    partial_reason: Optional[str] = Field(
+        None, description="Why the crawl was stopped early: \"deadline\" or \"token_budget\""
+    )
+    metrics: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Per-iteration model latency and tokens, per-tool-call fetch latency and bytes, and totals",
+    )
 
 
 class AgentDocTreeRequest(BaseModel):
@@ -0,0 +1,12 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from anp_examples.utils import json_codec
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSON response rendered with the shared codec (orjson when installed)"""
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps_bytes(content)
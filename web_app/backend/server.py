@@ -1,8 +1,9 @@
-import os
 import logging
 import time
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 
@@ -10,9 +11,17 @@ from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 
+from anp_examples.anp_tool import ANPTool
+from anp_examples.llm_clients import close_llm_clients
 from anp_examples.simple_example import simple_crawl
 from anp_examples.utils.log_base import setup_logging
+from web_app.backend.cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    ClientDisconnected,
+    run_until_disconnected,
+)
 from web_app.backend.models import QueryRequest, QueryResponse
+from web_app.backend.responses import CodecJSONResponse
 
 # Set up logging
 setup_logging()
@@ -21,11 +30,31 @@ logger = logging.getLogger(__name__)
 # Get project root directory
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 
+# Get DID paths
+did_document_path = str(ROOT_DIR / "use_did_test_public/did.json")
+private_key_path = str(ROOT_DIR / "use_did_test_public/key-1_private.pem")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one ANPTool (and its pooled HTTP session) and the LLM clients across all requests"""
+    app.state.anp_tool = ANPTool(
+        did_document_path=did_document_path, private_key_path=private_key_path
+    )
+    try:
+        yield
+    finally:
+        await app.state.anp_tool.close()
+        await close_llm_clients()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Agent Network Search API",
     description="Agent Network Search API based on ANP protocol",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=CodecJSONResponse,
 )
 
 # Configure CORS
@@ -37,10 +66,6 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-# Get DID paths
-did_document_path = str(ROOT_DIR / "use_did_test_public/did.json")
-private_key_path = str(ROOT_DIR / "use_did_test_public/key-1_private.pem")
-
 
 @app.get("/")
 async def read_root():
@@ -49,8 +74,8 @@ async def read_root():
 
 
 @app.post("/api/query", response_model=QueryResponse)
-async def query(request: QueryRequest):
-    """Process query request"""
+async def query(request: QueryRequest, http_request: Request):
+    """Process query request, cancelling the crawl if the client disconnects"""
     try:
         start_time = time.time()
         logger.info(f"Processing query: '{request.query}' with agent URL: {request.agent_url}")
@@ -60,20 +85,42 @@ async def query(request: QueryRequest):
         
         # Call simple_crawl function
         logger.info(f"Starting simple_crawl with task_type='general' and max_documents=10")
-        result = await simple_crawl(
-            user_input=request.query,
-            task_type="general",
-            did_document_path=did_document_path,
-            private_key_path=private_key_path,
-            max_documents=10,  # Crawl up to 10 documents
-            initial_url=initial_url,
+        result = await run_until_disconnected(
+            http_request,
+            simple_crawl(
+                user_input=request.query,
+                task_type="general",
+                did_document_path=did_document_path,
+                private_key_path=private_key_path,
+                max_documents=10,  # Crawl up to 10 documents
+                initial_url=initial_url,
+                anp_tool=app.state.anp_tool,
+                bypass_cache=request.bypass_cache,
+            ),
         )
         
         elapsed_time = time.time() - start_time
         logger.info(f"Query processed successfully in {elapsed_time:.2f} seconds")
+        if result.get("partial"):
+            logger.warning(f"Returned a partial answer, the crawl was stopped early ({result.get('partial_reason')})")
         logger.info(f"Visited {len(result.get('visited_urls', []))} URLs and crawled {len(result.get('crawled_documents', []))} documents")
+        metrics = result.get("metrics")
+        if metrics:
+            totals = metrics["totals"]
+            logger.info(
+                f"Time split: {totals['llm_calls']} model calls took {totals['llm_ms']:.0f} ms, "
+                f"tool calls took {totals['tool_ms']:.0f} ms, {totals['prompt_tokens']} prompt tokens "
+                f"({totals['cached_tokens']} cached), {totals['completion_tokens']} completion tokens"
+            )
+            fetches = [call for iteration in metrics["iterations"] for call in iteration["tool_calls"]]
+            if fetches:
+                slowest = max(fetches, key=lambda call: call["fetch_ms"])
+                logger.info(f"Slowest fetch: {slowest['url']} in {slowest['fetch_ms']:.0f} ms")
         
         return result
+    except ClientDisconnected:
+        logger.info(f"Client disconnected after {time.time() - start_time:.2f} seconds, crawl cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")